@@ -0,0 +1,159 @@
+"""
+Batch entry point: run many prompts through the agent in one process.
+
+Usage:
+    python batch.py prompts.jsonl [--concurrency N] [--output results.jsonl] [--verbose]
+    python batch.py - < prompts.jsonl
+    python batch.py prompts.jsonl --record transcript.jsonl   # or --replay transcript.jsonl
+
+Each input line is either a JSON object with a "prompt" (and optional "id")
+or a bare JSON string. One JSON result is written per prompt as soon as its
+session finishes; progress output goes to stderr so stdout stays JSONL.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+
+from clients import create_client
+from config import Config, load_environment
+from main import enable_context_cache, run_agent_async
+from tracing import tracer
+
+
+def read_prompts(stream):
+    """Yield one prompt item per non-empty JSONL line."""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield {"id": line_number, "error": f"invalid JSON: {e}"}
+            continue
+        if isinstance(item, str):
+            item = {"prompt": item}
+        if not isinstance(item, dict) or not item.get("prompt"):
+            yield {"id": line_number, "error": "missing prompt"}
+            continue
+        item.setdefault("id", line_number)
+        yield item
+
+
+async def run_prompt(client, item, semaphore, verbose=False):
+    """Run one agent session for a prompt item and return its result record."""
+    from google.genai import types
+
+    result = {"id": item["id"], "prompt": item.get("prompt")}
+    if "error" in item:
+        result["error"] = item["error"]
+        return result
+
+    async with semaphore:
+        messages = [
+            types.Content(
+                role="user",
+                parts=[types.Part(text=item["prompt"])]
+            ),
+        ]
+        try:
+            response = await run_agent_async(client, messages, verbose)
+            if response is None:
+                result["error"] = "Reached maximum number of iterations"
+            else:
+                result["response"] = response
+        except Exception as e:
+            result["error"] = str(e)
+    return result
+
+
+async def run_batch(client, items, output, concurrency, verbose=False) -> int:
+    """Run all prompt items, writing results as they complete. Returns the failure count."""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.create_task(run_prompt(client, item, semaphore, verbose)) for item in items]
+    failures = 0
+    for task in asyncio.as_completed(tasks):
+        result = await task
+        failures += "error" in result
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+    await client.aio.aclose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many agent prompts concurrently.")
+    parser.add_argument("input", help="JSONL file of prompts, or - for stdin")
+    parser.add_argument("--output", help="File to write JSONL results to (default: stdout)")
+    parser.add_argument(
+        "--concurrency", type=int, default=Config.BATCH_CONCURRENCY,
+        help="Number of sessions to run at once",
+    )
+    parser.add_argument(
+        "--context-cache", action="store_true", default=Config.USE_CONTEXT_CACHE,
+        help="Send the system prompt and tools as server-side cached content",
+    )
+    parser.add_argument(
+        "--rpm", type=int, default=Config.MODEL_REQUESTS_PER_MINUTE, metavar="N",
+        help="Keep model calls from all sessions under N requests per minute (0 = no limit)",
+    )
+    parser.add_argument(
+        "--tpm", type=int, default=Config.MODEL_TOKENS_PER_MINUTE, metavar="N",
+        help="Keep model calls from all sessions under N estimated tokens per minute (0 = no limit)",
+    )
+    parser.add_argument("--trace", metavar="PATH", help="Write timing spans to a JSONL trace file")
+    parser.add_argument("--record", metavar="PATH", help="Record model calls to a JSONL transcript")
+    parser.add_argument("--replay", metavar="PATH", help="Answer model calls from a recorded transcript")
+    parser.add_argument(
+        "--replay-latency", type=float, default=0.0, metavar="SECONDS",
+        help="Artificial latency added to each replayed model call",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    Config.MODEL_REQUESTS_PER_MINUTE = args.rpm
+    Config.MODEL_TOKENS_PER_MINUTE = args.tpm
+
+    load_environment()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key and not args.replay:
+        print("Error: GEMINI_API_KEY environment variable not set.")
+        sys.exit(1)
+
+    if args.input == "-":
+        items = list(read_prompts(sys.stdin))
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            items = list(read_prompts(f))
+
+    client = create_client(api_key, record=args.record, replay=args.replay, latency=args.replay_latency)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    context_cache = None
+    if args.trace:
+        tracer.enable()
+    try:
+        # The agent loop reports progress with print(); keep it out of the results
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.context_cache:
+                context_cache = enable_context_cache(client, args.verbose)
+            failures = asyncio.run(
+                run_batch(client, items, output, max(1, args.concurrency), args.verbose)
+            )
+    finally:
+        if context_cache is not None:
+            client.caches.delete(name=context_cache.name)
+        if output is not sys.stdout:
+            output.close()
+        if args.trace:
+            tracer.export(args.trace)
+            print(tracer.summary(), file=sys.stderr)
+
+    print(f"{len(items) - failures}/{len(items)} prompts completed", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark the overhead of the agent loop with a replayed model.
+
+The model is replaced by a ReplayClient with a fixed artificial latency, so
+everything else in an iteration (history compaction, request building,
+response handling, tool dispatch) is measured without the network.
+
+Usage:
+    python benchmarks/agent_loop.py [--transcript PATH] [--iterations N]
+                                    [--calls-per-turn K] [--latency SECONDS]
+
+Without --transcript a synthetic session is generated: N turns that each ask
+for K tool calls over the calculator workspace, followed by a text answer.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the agent modules
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from google.genai import types
+
+import main
+from clients import ReplayClient
+from config import MAX_ITERATIONS
+from history import estimate_tokens
+
+SYNTHETIC_CALLS = [
+    ("get_files_info", {"directory": "pkg"}),
+    ("get_file_content", {"file_path": "pkg/calculator.py"}),
+    ("get_file_content", {"file_path": "main.py"}),
+    ("run_python_file", {"file_path": "tests.py"}),
+]
+
+
+def synthetic_transcript(iterations: int, calls_per_turn: int) -> list:
+    """Build replay entries for `iterations` tool turns and a final answer."""
+    entries = []
+    for _ in range(iterations):
+        parts = [
+            types.Part(function_call=types.FunctionCall(name=name, args=args))
+            for name, args in (SYNTHETIC_CALLS * calls_per_turn)[:calls_per_turn]
+        ]
+        entries.append(_entry(parts))
+    entries.append(_entry([types.Part(text="The calculator works as expected.")]))
+    return entries
+
+
+def _entry(parts) -> dict:
+    response = types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=0, candidates_token_count=0),
+    )
+    return {"response": response.model_dump(mode="json", exclude_none=True)}
+
+
+def run_benchmark(client, max_iterations: int) -> list:
+    """Run one session and return per-iteration measurements."""
+    # Tool calls of a turn overlap, so track the window from the first start to the last end
+    tool_window = []
+    call_function = main.call_function
+
+    def timed_call_function(function_call_part, verbose=False):
+        start = time.perf_counter()
+        try:
+            return call_function(function_call_part, verbose=verbose)
+        finally:
+            tool_window.append((start, time.perf_counter()))
+
+    main.call_function = timed_call_function
+    messages = [types.Content(role="user", parts=[types.Part(text="Check that the calculator works")])]
+    rows = []
+    tracemalloc.start()
+    try:
+        for iteration in range(max_iterations):
+            tool_window.clear()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                main.compact_history(messages)
+                response = main.generate_content(client, messages)
+            wall = time.perf_counter() - start
+            tools = max(end for _, end in tool_window) - min(begin for begin, _ in tool_window) if tool_window else 0.0
+            rows.append({
+                "iteration": iteration + 1,
+                "wall": wall,
+                "tools": tools,
+                "overhead": wall - client.latency - tools,
+                "memory": tracemalloc.get_traced_memory()[0],
+                "tokens": estimate_tokens(messages),
+            })
+            if response:
+                break
+    finally:
+        tracemalloc.stop()
+        main.call_function = call_function
+    return rows
+
+
+def print_report(rows):
+    print(f"{'iter':>4} {'wall ms':>9} {'tools ms':>9} {'overhead ms':>12} {'memory KiB':>11} {'est. tokens':>12}")
+    for row in rows:
+        print(
+            f"{row['iteration']:>4} {row['wall'] * 1000:>9.2f} {row['tools'] * 1000:>9.2f} "
+            f"{row['overhead'] * 1000:>12.2f} {row['memory'] / 1024:>11.1f} {row['tokens']:>12}"
+        )
+    total_overhead = sum(row["overhead"] for row in rows)
+    print(f"\nIterations: {len(rows)}")
+    print(f"Mean loop overhead: {total_overhead / len(rows) * 1000:.2f} ms/iteration")
+    print(f"Mean tool dispatch: {sum(row['tools'] for row in rows) / len(rows) * 1000:.2f} ms/iteration")
+    print(f"Memory growth: {(rows[-1]['memory'] - rows[0]['memory']) / 1024:.1f} KiB")
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop against a replayed model.")
+    parser.add_argument("--transcript", type=os.path.abspath, help="Recorded JSONL transcript to replay (default: synthetic session)")
+    parser.add_argument("--iterations", type=int, default=MAX_ITERATIONS - 1, help="Tool turns in the synthetic session")
+    parser.add_argument("--calls-per-turn", type=int, default=4, help="Tool calls per synthetic turn")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial model latency in seconds")
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+    args = parser.parse_args()
+
+    # Tools resolve WORKING_DIR relative to the project root
+    os.chdir(ROOT_DIR)
+    transcript = args.transcript or synthetic_transcript(args.iterations, args.calls_per_turn)
+    client = ReplayClient(transcript, latency=args.latency)
+    print_report(run_benchmark(client, args.max_iterations))
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,153 @@
+"""
+Benchmark CLI startup: cold-start wall time and `python -X importtime`.
+
+Each case is a fresh interpreter running one entry point. Wall time is the
+median of several runs, reported as the overhead on top of a bare
+`python -c pass`, so results from different machines stay comparable. The
+import profile of one run gives the total import time, the slowest
+top-level imports, and whether modules that a case must not load (the
+Gemini SDK for --help and argument errors) were imported.
+
+Usage:
+    python benchmarks/startup.py [--runs N]           # print the report
+    python benchmarks/startup.py --check              # exit 1 on a new or forbidden import
+    python benchmarks/startup.py --update-baseline    # record current numbers
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+BASELINE_PATH = Path(__file__).parent / "startup_baseline.json"
+
+SDK_MODULES = ("google.genai",)
+
+# name -> (arguments to python, modules that must not be imported)
+CASES = {
+    "main --help": (["main.py", "--help"], SDK_MODULES),
+    "main bad flag": (["main.py", "--no-such-flag"], SDK_MODULES),
+    "daemon ask --help": (["daemon.py", "ask", "--help"], SDK_MODULES),
+    "batch --help": (["batch.py", "--help"], SDK_MODULES),
+    "batch bad flag": (["batch.py", "--no-such-flag"], SDK_MODULES),
+    "import main": (["-c", "import main"], SDK_MODULES),
+    "schemas built": (["-c", "import main; main.get_available_functions()"], ()),
+}
+
+
+def wall_times(args, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT_DIR, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def import_profile(args):
+    """Return ({module: (self us, cumulative us, depth)}) from one -X importtime run."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT_DIR, capture_output=True, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def measure(runs):
+    baseline_ms = statistics.median(wall_times(["-c", "pass"], runs)) * 1000
+    results = {}
+    for name, (args, forbidden) in CASES.items():
+        median_ms = statistics.median(wall_times(args, runs)) * 1000
+        modules = import_profile(args)
+        top_level = sorted(
+            ((cumulative, module) for module, (_, cumulative, depth) in modules.items() if depth == 0),
+            reverse=True,
+        )
+        results[name] = {
+            "overhead_ms": round(median_ms - baseline_ms, 1),
+            "import_ms": round(sum(self_us for self_us, _, _ in modules.values()) / 1000, 1),
+            "modules": len(modules),
+            "slowest": [f"{module} ({cumulative / 1000:.1f} ms)" for cumulative, module in top_level[:3]],
+            "forbidden": sorted(module for module in modules if module.startswith(forbidden)),
+        }
+    return baseline_ms, results
+
+
+def print_report(interpreter_ms, results):
+    print(f"Bare interpreter: {interpreter_ms:.1f} ms\n")
+    print(f"{'case':<20} {'overhead ms':>12} {'imports ms':>11} {'modules':>8}  slowest top-level imports")
+    for name, result in results.items():
+        print(
+            f"{name:<20} {result['overhead_ms']:>12.1f} {result['import_ms']:>11.1f} "
+            f"{result['modules']:>8}  {', '.join(result['slowest'])}"
+        )
+
+
+def check(results, baseline, module_slack):
+    """Return (regressions, timing notes) against the baseline.
+
+    Only forbidden imports and the number of imported modules are gated:
+    they are the same on every run, while wall times on a shared machine
+    vary more than any sensible tolerance. Slower timings are reported as
+    notes instead.
+    """
+    problems, notes = [], []
+    for name, result in results.items():
+        if result["forbidden"]:
+            problems.append(f"{name}: imports {', '.join(result['forbidden'][:3])}")
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        limit = expected["modules"] + module_slack
+        if result["modules"] > limit:
+            problems.append(f"{name}: {result['modules']} modules imported > {limit} (baseline {expected['modules']})")
+        for key in ("overhead_ms", "import_ms"):
+            if result[key] > expected[key] * 1.5:
+                notes.append(f"{name}: {key} {result[key]:.1f} (baseline {expected[key]:.1f})")
+    return problems, notes
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time and imports.")
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts per case")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a case regressed against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Write the results to {BASELINE_PATH.name}")
+    parser.add_argument("--module-slack", type=int, default=5, help="Extra imported modules allowed by --check")
+    args = parser.parse_args()
+
+    interpreter_ms, results = measure(args.runs)
+    print_report(interpreter_ms, results)
+
+    if args.update_baseline:
+        baseline = {
+            name: {"modules": r["modules"], "overhead_ms": r["overhead_ms"], "import_ms": r["import_ms"]}
+            for name, r in results.items()
+        }
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+
+    if args.check:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        problems, notes = check(results, baseline, args.module_slack)
+        if notes:
+            print("\nSlower than the baseline (not gated, timings vary between runs):")
+            for note in notes:
+                print(f"  {note}")
+        if problems:
+            print("\nStartup regressions:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print("\nNo startup regressions.")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,242 @@
+"""
+Benchmark the calculator engine and its numeric backends.
+
+The engine suite times each stage on generated expressions of growing
+length and nesting depth: _tokenize, _evaluate_infix (parsing and
+interpreting), _apply_operator, format_json_output, and compiled
+evaluation. The backend suite compares the float, decimal and fraction
+backends on a few typical workloads.
+
+Every case reports evaluations per second (timing with tracemalloc off)
+and the peak memory one call allocates (measured separately with
+tracemalloc on). Rates depend on the machine and are compared with a
+generous tolerance. Allocations hardly vary, so their tolerance is much
+tighter.
+
+Usage:
+    python benchmarks.py [--seconds S]            # print the report
+    python benchmarks.py --check                  # exit 1 on a regression
+    python benchmarks.py --update-baseline        # record current numbers
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from pkg.calculator import BACKENDS, Calculator
+from pkg.render import format_json_output
+
+BASELINE_PATH = Path(__file__).parent / "benchmarks_baseline.json"
+
+# (operands, nesting depth) of the generated expressions
+SHAPES = [(4, 0), (16, 0), (64, 0), (256, 0), (64, 8), (64, 32)]
+
+
+def generate_expression(operands, depth, seed=0):
+    """Return an expression with the given number of operands, `depth` of them wrapped in nested parentheses.
+
+    Expressions that would divide by zero are regenerated.
+    """
+    rng = random.Random(seed)
+    calculator = Calculator()
+    while True:
+        def chain(count):
+            return " ".join(f"{rng.randint(1, 99)} {rng.choice('+-*/')}" for _ in range(count - 1)) + f" {rng.randint(1, 99)}"
+
+        expression = chain(operands - depth)
+        for _ in range(depth):
+            expression = f"{rng.randint(1, 99)} {rng.choice('+-*/')} ({expression})"
+        try:
+            calculator.evaluate(expression)
+            return expression
+        except ZeroDivisionError:
+            continue
+
+
+def engine_cases():
+    """Return {case name: (function of a count, tokens per call)} for the engine stages."""
+    calculator = Calculator()
+    cases = {}
+    for operands, depth in SHAPES:
+        expression = generate_expression(operands, depth)
+        stripped = "".join(expression.split())
+        tokens = calculator._tokenize(stripped)
+        result = calculator.evaluate(expression)
+        shape = f"{operands} operands, depth {depth}"
+
+        def tokenize(count, stripped=stripped):
+            for _ in range(count):
+                calculator._tokenize(stripped)
+
+        def evaluate_infix(count, tokens=tokens):
+            for _ in range(count):
+                calculator._evaluate_infix(tokens)
+
+        def evaluate_compiled(count, expression=expression):
+            for _ in range(count):
+                calculator.evaluate(expression)
+
+        def render(count, expression=expression, result=result):
+            for _ in range(count):
+                format_json_output(expression, result)
+
+        cases[f"_tokenize: {shape}"] = (tokenize, len(tokens))
+        cases[f"_evaluate_infix: {shape}"] = (evaluate_infix, len(tokens))
+        cases[f"evaluate (cached): {shape}"] = (evaluate_compiled, len(tokens))
+        if depth == 0 and operands in (4, 256):
+            cases[f"format_json_output: {shape}"] = (render, len(tokens))
+
+    def apply_operator(count):
+        for _ in range(count):
+            calculator._apply_operator("*", [1.5, 2.5])
+
+    cases["_apply_operator"] = (apply_operator, 3)
+    return cases
+
+
+def backend_cases():
+    """Return {case name: (function of a count, tokens per call)} comparing the numeric backends."""
+    cases = {}
+    prices = [round(random.Random(i).uniform(1, 100), 2) for i in range(100)]
+    expressions = [generate_expression(7, 0, seed) for seed in range(1000)]
+    for backend in BACKENDS:
+        calculator = Calculator(backend=backend)
+        formula = calculator.compile("price * quantity * (1 + tax) - discount")
+        whole = calculator.compile("a * b + c - 7")
+        uncached = Calculator(backend=backend, cache_size=0)
+
+        def compiled_formula(count, formula=formula):
+            for i in range(count):
+                formula(price=prices[i % 100], quantity=3, tax=0.2, discount=1.5)
+
+        def whole_number_formula(count, whole=whole):
+            for i in range(count):
+                whole(a=i, b=12, c=400)
+
+        def distinct_expressions(count, uncached=uncached):
+            for i in range(count):
+                uncached.evaluate(expressions[i % len(expressions)])
+
+        cases[f"{backend}: compiled formula"] = (compiled_formula, 11)
+        cases[f"{backend}: whole-number formula"] = (whole_number_formula, 7)
+        cases[f"{backend}: distinct expressions"] = (distinct_expressions, 13)
+    return cases
+
+
+def ops_per_second(function, seconds):
+    """Run function with growing counts until one run takes `seconds`, and return its rate."""
+    count = 10
+    while True:
+        start = time.perf_counter()
+        function(count)
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+        count = int(count * min(10, max(2, seconds / max(elapsed, 1e-6) * 1.2)))
+
+
+def peak_bytes(function):
+    """Return the most memory a single call allocates at once, according to tracemalloc."""
+    function(1)  # Leave one-time costs (caches, compiled programs) out of the measurement
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(3):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            function(1)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        return peak
+    finally:
+        tracemalloc.stop()
+
+
+def measure(seconds, suites=("engine", "backends")):
+    """Return {case: {"ops_per_sec", "us_per_token", "peak_bytes"}}."""
+    cases = {}
+    if "engine" in suites:
+        cases.update(engine_cases())
+    if "backends" in suites:
+        cases.update(backend_cases())
+    results = {}
+    for name, (function, tokens) in cases.items():
+        rate = ops_per_second(function, seconds)
+        results[name] = {
+            "ops_per_sec": round(rate, 1),
+            "us_per_token": round(1e6 / rate / tokens, 4),
+            "peak_bytes": peak_bytes(function),
+        }
+    return results
+
+
+def print_report(results):
+    print(f"{'case':<48} {'ops/sec':>12} {'us/token':>9} {'peak bytes':>11}")
+    for name, result in results.items():
+        print(
+            f"{name:<48} {result['ops_per_sec']:>12,.0f} {result['us_per_token']:>9.3f} "
+            f"{result['peak_bytes']:>11,}"
+        )
+
+
+def check(results, baseline, tolerance, memory_tolerance, slack_bytes=256):
+    """Return a list of regressions against the baseline."""
+    problems = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        minimum = expected["ops_per_sec"] / (1 + tolerance)
+        if result["ops_per_sec"] < minimum:
+            problems.append(
+                f"{name}: {result['ops_per_sec']:,.0f} ops/sec < {minimum:,.0f} "
+                f"(baseline {expected['ops_per_sec']:,.0f})"
+            )
+        limit = expected["peak_bytes"] * (1 + memory_tolerance) + slack_bytes
+        if result["peak_bytes"] > limit:
+            problems.append(
+                f"{name}: peak {result['peak_bytes']:,} bytes > {limit:,.0f} "
+                f"(baseline {expected['peak_bytes']:,})"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the calculator engine and backends.")
+    parser.add_argument("--seconds", type=float, default=0.2, help="Minimum duration of each measurement")
+    parser.add_argument("--suite", choices=["engine", "backends"], help="Run only one suite")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a case regressed against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Write the results to {BASELINE_PATH.name}")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Allowed slowdown for --check (1.0 = half the rate)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1, help="Allowed relative growth of peak memory")
+    args = parser.parse_args()
+
+    results = measure(args.seconds, (args.suite,) if args.suite else ("engine", "backends"))
+    print_report(results)
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update(
+            {name: {"ops_per_sec": r["ops_per_sec"], "peak_bytes": r["peak_bytes"]} for name, r in results.items()}
+        )
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+
+    if args.check:
+        if not BASELINE_PATH.exists():
+            print(f"\nNo baseline at {BASELINE_PATH}; run with --update-baseline first.")
+            sys.exit(1)
+        problems = check(results, json.loads(BASELINE_PATH.read_text()), args.tolerance, args.memory_tolerance)
+        if problems:
+            print(f"\n{len(problems)} calculator benchmark regression(s):")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print("\nNo calculator benchmark regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,154 @@
 # main.py
 
+import argparse
+import functools
 import sys
-from pkg.calculator import Calculator
-from pkg.render import format_json_output
+import time
+from collections import deque
+from pkg.calculator import BACKENDS, DEFAULT_BACKEND, DEFAULT_PRECISION, Calculator
+from pkg.render import format_json_output, format_ndjson_line
+
+BATCH_CHUNK_LINES = 256  # Expressions sent to a worker at a time in batch mode
+BATCH_STALL_SECONDS = 0.05  # How long a partial chunk waits for more input
+
+
+@functools.cache
+def get_calculator(backend=None, precision=None):
+    """Return this process's Calculator for a backend, so its compiled programs are reused."""
+    return Calculator(backend=backend, precision=precision)
+
+
+def evaluate_lines(lines, backend=None, precision=None):
+    """Evaluate expressions and return (NDJSON text, number of failed lines)."""
+    calculator = get_calculator(backend, precision)
+    output = []
+    failures = 0
+    for expression in lines:
+        try:
+            result = calculator.evaluate(expression)
+            if result is None:
+                raise ValueError("Expression is empty or contains only whitespace.")
+            output.append(format_ndjson_line(expression, result))
+        except Exception as e:
+            failures += 1
+            output.append(format_ndjson_line(expression, error=str(e) or type(e).__name__))
+    return "".join(output), failures
+
+
+def run_batch(stream, output, workers=1, backend=None, precision=None):
+    """Evaluate one expression per input line and write NDJSON results in input order.
+
+    Each result is written as soon as its line is evaluated, so a producer
+    that writes a line and waits for the answer is not kept waiting. Returns
+    the number of lines that failed.
+    """
+    failures = 0
+
+    def emit(text, failed):
+        nonlocal failures
+        output.write(text)
+        output.flush()
+        failures += failed
+
+    if workers <= 1:
+        for line in stream:
+            emit(*evaluate_lines([line.rstrip("\r\n")], backend, precision))
+        return failures
+
+    import queue
+    import threading
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Lines are read on a thread so a partial chunk can be sent off when the input stalls
+    lines = queue.Queue(maxsize=BATCH_CHUNK_LINES * workers * 2)
+
+    def read():
+        try:
+            for line in stream:
+                lines.put(line.rstrip("\r\n"))
+            lines.put(None)
+        except BaseException as e:
+            lines.put(e)
+
+    threading.Thread(target=read, daemon=True).start()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a few chunks in flight per worker; results are written as soon as
+        # every earlier chunk is done, so output streams without reordering
+        pending = deque()
+        chunk, deadline = [], None
+        while True:
+            if chunk:
+                timeout = max(0.0, deadline - time.monotonic())
+            else:
+                timeout = BATCH_STALL_SECONDS if pending else None
+            try:
+                line = lines.get(timeout=timeout)
+            except queue.Empty:
+                line = queue.Empty  # No input for a while
+            if isinstance(line, BaseException):
+                raise line
+            if isinstance(line, str):
+                if not chunk:
+                    deadline = time.monotonic() + BATCH_STALL_SECONDS
+                chunk.append(line)
+            if chunk and (line is None or len(chunk) >= BATCH_CHUNK_LINES or time.monotonic() >= deadline):
+                pending.append(pool.submit(evaluate_lines, chunk, backend, precision))
+                chunk = []
+            while pending and (line is None or pending[0].done() or len(pending) >= workers * 2):
+                emit(*pending.popleft().result())
+            if line is None:
+                return failures
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Evaluate arithmetic expressions.")
+    parser.add_argument("expression", nargs="*", help="The expression to evaluate")
+    parser.add_argument(
+        "--batch", nargs="?", const="-", metavar="FILE",
+        help="Evaluate one expression per line of FILE (default: stdin) and print NDJSON results",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes evaluating batch lines")
+    parser.add_argument(
+        "--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND,
+        help="Numbers to compute with: float, decimal (rounded to --precision digits) or exact fractions",
+    )
+    parser.add_argument(
+        "--precision", type=int, default=DEFAULT_PRECISION,
+        help="Significant digits of the decimal backend (default: CALCULATOR_PRECISION or 10)",
+    )
+    args = parser.parse_args(argv)
+    if args.precision < 1:
+        parser.error(f"--precision must be 1 or greater, got {args.precision}")
+    if args.workers < 1:
+        parser.error(f"--workers must be 1 or greater, got {args.workers}")
+    if args.batch not in (None, "-"):
+        try:
+            args.batch = open(args.batch, encoding="utf-8")
+        except OSError as e:
+            parser.error(f"can't open '{args.batch}': {e.strerror}")
+    return args
 
 
 def main():
-    calculator = Calculator()
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print('       python main.py --batch [FILE] [--workers N]')
         print('Example: python main.py "3 + 5"')
         return
 
-    expression = " ".join(sys.argv[1:])
+    args = parse_args(sys.argv[1:])
+    if args.batch is not None:
+        if args.batch == "-":
+            failures = run_batch(sys.stdin, sys.stdout, args.workers, args.backend, args.precision)
+        else:
+            with args.batch as f:
+                failures = run_batch(f, sys.stdout, args.workers, args.backend, args.precision)
+        sys.exit(1 if failures else 0)
+
+    expression = " ".join(args.expression)
     try:
-        result = calculator.evaluate(expression)
+        result = get_calculator(args.backend, args.precision).evaluate(expression)
         if result is not None:
             to_print = format_json_output(expression, result)
             print(to_print)
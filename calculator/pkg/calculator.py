@@ -1,76 +1,381 @@
+import decimal
+import fractions
+import os
+import re
+from collections import OrderedDict
+
+# Numbers, variable names, operators and parentheses; anything else is an invalid token
+TOKEN_PATTERN = re.compile(r'\d+\.?\d*|[A-Za-z_]\w*|[-+*/%^()]|\S+')
+NAME_PATTERN = re.compile(r'[A-Za-z_]\w*')
+
+COMPILE_CACHE_SIZE = 256  # Compiled programs kept per Calculator
+
+# Numeric types a Calculator can compute with
+BACKENDS = {"float": float, "decimal": decimal.Decimal, "fraction": fractions.Fraction}
+DEFAULT_BACKEND = os.environ.get("CALCULATOR_BACKEND", "float")
+DEFAULT_PRECISION = int(os.environ.get("CALCULATOR_PRECISION", 10))  # Significant digits of the decimal backend
+
+# Names operators are given when the generated code calls a function for them
+OPERATOR_NAMES = {"+": "add", "-": "sub", "*": "mul", "/": "div"}
+
+
+def _numpy():
+    """Return the numpy module, or None if it isn't installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class Program:
+    """A compiled expression.
+
+    postfix holds constants (of the backend's number type), variable names and operators in
+    evaluation order. function evaluates it with one positional argument per
+    name in variables, in order of first appearance; until generated is set
+    it interprets postfix rather than running generated Python code.
+    vectorized is the NumPy version used by Calculator.evaluate_batch, built
+    on first use.
+    """
+
+    __slots__ = ("expression", "postfix", "variables", "function", "generated", "vectorized")
+
+    def __init__(self, expression, postfix, variables, function):
+        self.expression = expression
+        self.postfix = postfix
+        self.variables = variables
+        self.function = function
+        self.generated = False
+        self.vectorized = None
+
+    def __call__(self, **bindings):
+        try:
+            return self.function(*[bindings[name] for name in self.variables])
+        except KeyError as e:
+            raise ValueError(f"unbound variable: {e.args[0]}") from None
+
+    def __repr__(self):
+        return f"Program({self.expression!r}, variables={self.variables})"
+
+
 class Calculator:
-    def __init__(self):
+    """Evaluates infix expressions with a float, decimal or fraction backend.
+
+    The decimal backend rounds every result to precision significant digits
+    (CALCULATOR_PRECISION by default); the fraction backend is exact.
+    """
+
+    def __init__(self, cache_size=COMPILE_CACHE_SIZE, backend=None, precision=None):
+        self.backend = backend or DEFAULT_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"unknown backend: {self.backend} (choose from {', '.join(BACKENDS)})")
+        self.precision = DEFAULT_PRECISION if precision is None else int(precision)
+        if self.precision < 1:
+            raise ValueError(f"precision must be 1 or greater, got {self.precision}")
+        self.number = BACKENDS[self.backend]
         self.operators = {
             "+": lambda a, b: a + b,
             "-": lambda a, b: a - b,
             "*": lambda a, b: a * b,
             "/": lambda a, b: a / b,
         }
+        # Operators the generated code must call instead of writing them inline
+        self._called = {}
+        self.context = None
+        if self.backend == "decimal":
+            self.context = context = decimal.Context(prec=self.precision)
+
+            def divide(a, b):
+                # Decimal reports 0 / 0 as InvalidOperation; keep ZeroDivisionError like the other backends
+                if not b:
+                    raise ZeroDivisionError("decimal division by zero")
+                return context.divide(a, b)
+            self.operators = {"+": context.add, "-": context.subtract, "*": context.multiply, "/": divide}
+            self._called = self.operators
         self.precedence = {
             "+": 1,
             "-": 1,
             "*": 2,
             "/": 2,
         }
+        self.cache_size = cache_size
+        self._programs = OrderedDict()
 
     def _tokenize(self, expression):
-        import re
-        # Tokenize numbers, operators, and parentheses
-        token_pattern = r'\d+\.?\d*|[-+*/%^()]|\S+'
-        tokens = re.findall(token_pattern, expression)
-        return tokens
+        # Tokenize numbers, names, operators, and parentheses
+        return TOKEN_PATTERN.findall(expression)
 
-    def evaluate(self, expression):
+    def evaluate(self, expression, variables=None):
         if not expression or expression.isspace():
             return None
-            
+
+        return self._program(expression)(**(variables or {}))
+
+    def compile(self, expression):
+        """Return the Program for an expression, reusing a cached one when possible."""
+        program = self._program(expression)
+        self._generate(program)
+        return program
+
+    def _program(self, expression):
+        """Return the cached Program for an expression, or parse a new one.
+
+        Generating code costs more than interpreting an expression once, so a
+        new program is interpreted until its expression comes back.
+        """
         # Clean up the expression by removing all whitespace
-        expression = ''.join(expression.split())
-        
-        # Tokenize the expression
-        tokens = self._tokenize(expression)
-        
-        return self._evaluate_infix(tokens)
-
-    def _evaluate_infix(self, tokens):
-        values = []
+        key = ''.join(expression.split())
+        if not key:
+            raise ValueError("empty expression")
+        program = self._programs.get(key)
+        if program is not None:
+            self._programs.move_to_end(key)
+            self._generate(program)
+            return program
+
+        postfix = self._to_postfix(self._tokenize(key))
+        variables = tuple(dict.fromkeys(item for item in postfix if isinstance(item, str) and item not in self.operators))
+        if self.backend == "float":
+            program = Program(key, postfix, variables, lambda *values: self._run_postfix(postfix, dict(zip(variables, values))))
+        else:
+            program = Program(key, postfix, variables, self._exact_function(
+                lambda *values: self._run_postfix(postfix, dict(zip(variables, values)))))
+        self._programs[key] = program
+        if len(self._programs) > self.cache_size:
+            self._programs.popitem(last=False)
+        return program
+
+    def _generate(self, program):
+        if not program.generated:
+            function = self._build_function(program.postfix, program.variables, self._called)
+            if self.backend != "float":
+                function = self._exact_function(function, program)
+            if not program.variables:
+                try:
+                    value = function()
+                except ArithmeticError:
+                    pass  # Raised again on every call, like any other evaluation
+                else:
+                    function = lambda: value
+            program.function = function
+            program.generated = True
+
+    def _convert(self, value):
+        """Convert a variable's value to the backend's number type."""
+        if isinstance(value, self.number):
+            return value
+        # A float's repr is the short decimal it was written as (0.1, not 0.1000000000000000055...)
+        return self.number(repr(value) if isinstance(value, float) else value)
+
+    def _exact_function(self, function, program=None):
+        """Wrap a function of the decimal or fraction backend.
+
+        Inputs are converted to the backend's type, and decimal results are
+        rounded to the context, so a bare constant or variable has the same
+        precision as a computed result. When a fraction program only adds,
+        subtracts and multiplies whole numbers and is given ints, it is
+        computed with Python ints instead, which are exact at any size, and
+        only the result is converted.
+        """
+        convert = self._convert
+        if self.context is not None:
+            plus = self.context.plus
+            return lambda *values: plus(function(*map(convert, values)))
+        constants = [] if program is None else [item for item in program.postfix if not isinstance(item, str)]
+        if program is None or "/" in program.postfix or any(constant != int(constant) for constant in constants):
+            return lambda *values: function(*map(convert, values))
+
+        integer_postfix = [item if isinstance(item, str) else int(item) for item in program.postfix]
+        integer_function = self._build_function(integer_postfix, program.variables)
+        number = self.number
+
+        def evaluate(*values):
+            if all(type(value) is int for value in values):
+                return number(integer_function(*values))
+            return function(*map(convert, values))
+        return evaluate
+
+    def evaluate_batch(self, expression, columns, use_numpy=None):
+        """Evaluate an expression (or a compiled Program) once per row of columns.
+
+        columns maps each variable to a sequence of values, or to a single
+        value shared by every row. With NumPy installed the whole batch is
+        computed in one vectorized pass and a float64 array is returned;
+        otherwise (or with use_numpy=False, or another backend) rows are
+        evaluated one at a time and a list of results is returned. As with evaluate, dividing by zero
+        raises ZeroDivisionError, here naming the first row that does. Empty columns give [] on
+        either path, since there is no row to evaluate.
+        """
+        program = expression if isinstance(expression, Program) else self.compile(expression)
+        for name in program.variables:
+            if name not in columns:
+                raise ValueError(f"unbound variable: {name}")
+        values = [columns[name] for name in program.variables]
+        lengths = {len(value) for value in values if hasattr(value, "__len__")}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+        rows = lengths.pop() if lengths else 1
+
+        numpy = _numpy() if use_numpy is not False else None
+        if use_numpy and numpy is None:
+            raise ImportError("use_numpy=True requires NumPy to be installed")
+        if self.backend != "float":
+            if use_numpy:
+                raise ValueError(f"NumPy evaluation only supports the float backend, not {self.backend}")
+            numpy = None
+        if rows == 0:
+            return []
+        if numpy is None:
+            return self._evaluate_rows(program, values, rows)
+        return self._evaluate_vectorized(program, values, rows, numpy)
+
+    def _evaluate_rows(self, program, values, rows):
+        columns = [value if hasattr(value, "__len__") else [value] * rows for value in values]
+        number = float if self.backend == "float" else self.number
+        results = []
+        for row, arguments in enumerate(zip(*columns) if columns else [()] * rows):
+            try:
+                results.append(number(program.function(*arguments)))
+            except ZeroDivisionError:
+                raise ZeroDivisionError(f"{self.backend} division by zero (row {row})") from None
+        return results
+
+    def _evaluate_vectorized(self, program, values, rows, numpy):
+        if program.vectorized is None:
+            def divide(a, b):
+                zero = numpy.equal(b, 0)
+                if zero.any():
+                    row = int(numpy.argmax(zero)) if zero.ndim else 0
+                    raise ZeroDivisionError(f"float division by zero (row {row})")
+                return numpy.true_divide(a, b)
+            program.vectorized = self._build_function(program.postfix, program.variables, {"/": divide})
+
+        arrays = [numpy.asarray(value, dtype=numpy.float64) for value in values]
+        # Overflow gives inf and inf - inf gives nan, as with Python floats, so NumPy needn't warn
+        with numpy.errstate(all="ignore"):
+            result = program.vectorized(*arrays)
+        return numpy.array(numpy.broadcast_to(result, (rows,)), dtype=numpy.float64)
+
+    def _to_postfix(self, tokens):
+        """Convert infix tokens to postfix with the shunting-yard algorithm, validating them."""
+        output = []
         operators = []
+        expect_operand = True
 
         for token in tokens:
             if token in self.operators:
+                if expect_operand:
+                    raise ValueError(f"not enough operands for operator {token}")
                 while (
                     operators
                     and operators[-1] in self.operators
                     and self.precedence[operators[-1]] >= self.precedence[token]
                 ):
-                    self._apply_operator(operators, values)
+                    output.append(operators.pop())
                 operators.append(token)
+                expect_operand = True
+            elif token == "(":
+                if not expect_operand:
+                    raise ValueError("invalid expression")
+                operators.append(token)
+            elif token == ")":
+                if expect_operand:
+                    raise ValueError("invalid expression")
+                while operators and operators[-1] != "(":
+                    output.append(operators.pop())
+                if not operators:
+                    raise ValueError("unbalanced parentheses")
+                operators.pop()
             else:
-                try:
-                    values.append(float(token))
-                except ValueError:
-                    raise ValueError(f"invalid token: {token}")
+                if not expect_operand:
+                    raise ValueError("invalid expression")
+                if NAME_PATTERN.fullmatch(token):
+                    output.append(token)
+                else:
+                    try:
+                        output.append(self.number(token))
+                    except (ValueError, ArithmeticError):
+                        raise ValueError(f"invalid token: {token}")
+                expect_operand = False
 
+        if expect_operand:
+            raise ValueError("invalid expression")
         while operators:
-            self._apply_operator(operators, values)
+            operator = operators.pop()
+            if operator == "(":
+                raise ValueError("unbalanced parentheses")
+            output.append(operator)
+        return output
 
-        if len(values) != 1:
-            raise ValueError("invalid expression")
+    def _build_function(self, postfix, variables, functions=None):
+        """Turn a postfix program into a Python function of its variables.
 
-        return values[0]
+        Operators in functions are applied by calling the given function
+        instead of the inline Python operator. Only parentheses the
+        precedence rules need are emitted, so long left-associative chains
+        stay flat. Programs too deep for Python's compiler fall back to
+        interpreting the postfix form.
+        """
+        functions = functions or {}
+        namespace = {f"_{OPERATOR_NAMES[operator]}": function for operator, function in functions.items()}
+        slots = {name: f"_v{index}" for index, name in enumerate(variables)}
+        constants = {}
+        stack = []  # (source, precedence); operands bind tightest
+        for item in postfix:
+            if isinstance(item, str) and item in self.operators:
+                (right, right_precedence), (left, left_precedence) = stack.pop(), stack.pop()
+                if item in functions:
+                    stack.append((f"_{OPERATOR_NAMES[item]}({left}, {right})", 3))
+                    continue
+                precedence = self.precedence[item]
+                if left_precedence < precedence:
+                    left = f"({left})"
+                # Floating point addition and multiplication aren't associative either
+                if right_precedence <= precedence:
+                    right = f"({right})"
+                stack.append((f"{left} {item} {right}", precedence))
+            elif isinstance(item, str):
+                stack.append((slots[item], 3))
+            else:
+                constant = f"_c{len(constants)}"
+                constants[constant] = item
+                stack.append((constant, 3))
 
-    def _apply_operator(self, operators, values):
-        if not operators:
-            return
+        source = f"lambda {', '.join(slots.values())}: {stack[0][0]}"
+        try:
+            return eval(source, {"__builtins__": {}, **namespace, **constants})
+        except (SyntaxError, RecursionError, MemoryError):
+            operators = {**self.operators, **functions}
+            return lambda *values: self._run_postfix(postfix, dict(zip(variables, values)), operators)
 
-        operator = operators.pop()
+    def _evaluate_infix(self, tokens, variables=None):
+        """Evaluate infix tokens directly, without compiling or caching them."""
+        return self._run_postfix(self._to_postfix(tokens), variables or {})
+
+    def _run_postfix(self, postfix, variables, operators=None):
+        values = []
+        for item in postfix:
+            if isinstance(item, str) and item in self.operators:
+                self._apply_operator(item, values, operators)
+            elif isinstance(item, str):
+                if item not in variables:
+                    raise ValueError(f"unbound variable: {item}")
+                values.append(variables[item])
+            else:
+                values.append(item)
+        return values[0]
+
+    def _apply_operator(self, operator, values, operators=None):
         if len(values) < 2:
             raise ValueError(f"not enough operands for operator {operator}")
 
         b = values.pop()
         a = values.pop()
-        values.append(self.operators[operator](a, b))
+        values.append((operators or self.operators)[operator](a, b))
+
 
-calculator = Calculator()
-result = calculator.evaluate("3 + 7 * 2")
-print(result)
+if __name__ == "__main__":
+    calculator = Calculator()
+    result = calculator.evaluate("3 + 7 * 2")
+    print(result)
@@ -1,14 +1,32 @@
 import json
+from decimal import Decimal
+from fractions import Fraction
 
 
-def format_json_output(expression: str, result: float, indent: int = 2) -> str:
+def _json_number(result):
     if isinstance(result, float) and result.is_integer():
-        result_to_dump = int(result)
-    else:
-        result_to_dump = result
+        return int(result)
+    # Exact results that aren't whole numbers are written as strings so no digits are lost to float
+    if isinstance(result, Decimal):
+        return int(result) if result.is_finite() and result == result.to_integral_value() else str(result)
+    if isinstance(result, Fraction):
+        return int(result) if result.denominator == 1 else str(result)
+    return result
 
+
+def format_json_output(expression: str, result: float, indent: int = 2) -> str:
     output_data = {
         "expression": expression,
-        "result": result_to_dump,
+        "result": _json_number(result),
     }
     return json.dumps(output_data, indent=indent)
+
+
+def format_ndjson_line(expression: str, result: float = None, error: str = None) -> str:
+    """Format one result (or error) as a compact JSON line, newline included."""
+    output_data = {"expression": expression}
+    if error is not None:
+        output_data["error"] = error
+    else:
+        output_data["result"] = _json_number(result)
+    return json.dumps(output_data, separators=(",", ":")) + "\n"
@@ -1,5 +1,13 @@
+import contextlib
+import io
+import json
+import time
 import unittest
-from pkg.calculator import Calculator
+from decimal import Decimal
+from fractions import Fraction
+from benchmarks import check, generate_expression, peak_bytes
+from main import parse_args, run_batch
+from pkg.calculator import Calculator, _numpy
 
 class TestCalculator(unittest.TestCase):
     def setUp(self):
@@ -41,6 +49,191 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("+ 3")
 
+    def test_parentheses(self):
+        self.assertEqual(self.calculator.evaluate("(2 + 3) * 4"), 20)
+        self.assertEqual(self.calculator.evaluate("10 - (4 - 3)"), 9)
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("(2 + 3")
+
+    def test_variables(self):
+        program = self.calculator.compile("rate * hours + bonus")
+        self.assertEqual(program.variables, ("rate", "hours", "bonus"))
+        self.assertEqual(program(rate=20, hours=8, bonus=5), 165)
+        self.assertEqual(self.calculator.evaluate("x / 4", {"x": 10}), 2.5)
+        with self.assertRaises(ValueError):
+            program(rate=20)
+
+    def test_compiled_programs_are_cached(self):
+        calculator = Calculator(cache_size=2)
+        first = calculator.compile("1 + x")
+        self.assertIs(calculator.compile("1+x"), first)
+        calculator.compile("2 + x")
+        calculator.compile("3 + x")
+        self.assertIsNot(calculator.compile("1 + x"), first)
+
+    def test_compiled_matches_interpreted(self):
+        for expression in ["2 * 3 - 8 / 2 + 5", "1 - 2 - 3", "8 / 4 / 2", "0.1 + 0.2 + 0.3", "1 - (2 - (3 - 4))"]:
+            tokens = self.calculator._tokenize("".join(expression.split()))
+            self.assertEqual(self.calculator.evaluate(expression), self.calculator._evaluate_infix(tokens))
+
+    def test_deeply_nested_expression(self):
+        expression = "1-(" * 500 + "1" + ")" * 500
+        self.assertEqual(self.calculator.evaluate(expression), 1)
+
+    def test_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate("1 / (2 - 2)")
+
+    def test_batch_pure_python(self):
+        results = self.calculator.evaluate_batch("a * x + b", {"a": [1, 2, 3], "x": 2, "b": [0.5, 0, -1]}, use_numpy=False)
+        self.assertEqual(results, [2.5, 4.0, 5.0])
+        with self.assertRaisesRegex(ZeroDivisionError, "row 1"):
+            self.calculator.evaluate_batch("1 / x", {"x": [1, 0, 2]}, use_numpy=False)
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_batch("x + y", {"x": [1, 2], "y": [1]}, use_numpy=False)
+
+    def test_batch_empty_columns(self):
+        self.assertEqual(self.calculator.evaluate_batch("x / 0", {"x": []}, use_numpy=False), [])
+        self.assertEqual(self.calculator.evaluate_batch("x / 0", {"x": []}), [])
+
+    @unittest.skipIf(_numpy() is None, "NumPy is not installed")
+    def test_batch_numpy_matches_scalar(self):
+        program = self.calculator.compile("(x - y) / (x + 1) * 3 - y / 7")
+        columns = {"x": [0.1 * i for i in range(1000)], "y": [i % 13 for i in range(1000)]}
+        results = self.calculator.evaluate_batch(program, columns, use_numpy=True)
+        expected = [program(x=x, y=y) for x, y in zip(columns["x"], columns["y"])]
+        self.assertEqual(results.tolist(), expected)
+        self.assertEqual(self.calculator.evaluate_batch("2 * 3", {}, use_numpy=True).tolist(), [6.0])
+        with self.assertRaisesRegex(ZeroDivisionError, "row 2"):
+            self.calculator.evaluate_batch("1 / (x - 2)", {"x": [0, 1, 2, 3]}, use_numpy=True)
+
+    @unittest.skipIf(_numpy() is None, "NumPy is not installed")
+    def test_batch_numpy_matches_rows(self):
+        cases = [
+            ("a * x + b", {"a": [1, 2, 3], "x": 2, "b": [0.5, 0, -1]}),
+            ("x * x - y / 3", {"x": [-1.5, 0, 2.25, 1e10], "y": [3, -6, 0.1, 1e300]}),
+            ("2 * 3", {}),
+            ("x / 0", {"x": []}),
+        ]
+        for expression, columns in cases:
+            with self.subTest(expression=expression):
+                rows = self.calculator.evaluate_batch(expression, columns, use_numpy=False)
+                vectorized = self.calculator.evaluate_batch(expression, columns, use_numpy=True)
+                self.assertEqual(list(vectorized), rows)
+        for use_numpy in (False, True):
+            with self.assertRaisesRegex(ZeroDivisionError, "row 1"):
+                self.calculator.evaluate_batch("1 / x", {"x": [1, 0, 2]}, use_numpy=use_numpy)
+
+    def test_decimal_backend(self):
+        calculator = Calculator(backend="decimal", precision=10)
+        self.assertEqual(calculator.evaluate("0.1 + 0.2"), Decimal("0.3"))
+        self.assertEqual(calculator.evaluate("1 / 3"), Decimal("0.3333333333"))
+        self.assertEqual(calculator.evaluate("price * 3", {"price": 19.99}), Decimal("59.97"))
+        self.assertEqual(Calculator(backend="decimal", precision=4).evaluate("2 / 3"), Decimal("0.6667"))
+        for expression in ("1 / 0", "0 / 0"):
+            with self.assertRaises(ZeroDivisionError):
+                calculator.evaluate(expression)
+
+    def test_fraction_backend(self):
+        calculator = Calculator(backend="fraction")
+        self.assertEqual(calculator.evaluate("1 / 3 + 1 / 6"), Fraction(1, 2))
+        self.assertEqual(calculator.evaluate("x - 0.1", {"x": 0.3}), Fraction(1, 5))
+        with self.assertRaises(ZeroDivisionError):
+            calculator.evaluate("1 / (x - 1)", {"x": 1})
+
+    def test_integer_fast_path_is_exact(self):
+        for backend, number in (("decimal", Decimal), ("fraction", Fraction)):
+            program = Calculator(backend=backend, precision=40).compile("a * b - 1")
+            result = program(a=2 ** 62, b=3)
+            self.assertIsInstance(result, number)
+            self.assertEqual(result, 3 * 2 ** 62 - 1)
+            self.assertEqual(program(a=Decimal("1.5"), b=2), 2)
+        self.assertEqual(Calculator(backend="decimal", precision=3).evaluate("1234 * x", {"x": 1}), Decimal("1.23E+3"))
+
+    def test_decimal_rounding_is_consistent(self):
+        calculator = Calculator(backend="decimal", precision=3)
+        first = calculator.evaluate("x * x - 1002000", {"x": 1001})
+        self.assertEqual(first, Decimal("-2.00E+3"))
+        self.assertEqual(calculator.evaluate("x * x - 1002000", {"x": 1001}), first)
+        self.assertEqual(calculator.evaluate("x * x - 1002000", {"x": 1001.0}), first)
+        for _ in range(2):
+            self.assertEqual(str(calculator.evaluate("1.23456")), "1.23")
+            self.assertEqual(str(calculator.evaluate("x", {"x": 9.8765})), "9.88")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Calculator(backend="binary")
+
+
+class TestBatchMode(unittest.TestCase):
+    lines = ["3 + 5", "", "1 / 0", "(2 + 3) * 4", "7 / 2"]
+
+    def run_lines(self, workers):
+        output = io.StringIO()
+        failures = run_batch(io.StringIO("\n".join(self.lines * 300) + "\n"), output, workers)
+        return [json.loads(line) for line in output.getvalue().splitlines()], failures
+
+    def test_results_and_errors_per_line(self):
+        results, failures = self.run_lines(workers=1)
+        self.assertEqual(len(results), 1500)
+        self.assertEqual(failures, 600)
+        self.assertEqual(results[0], {"expression": "3 + 5", "result": 8})
+        self.assertIn("error", results[1])
+        self.assertEqual(results[2], {"expression": "1 / 0", "error": "float division by zero"})
+        self.assertEqual(results[4]["result"], 3.5)
+
+    def test_exact_results_are_strings(self):
+        output = io.StringIO()
+        run_batch(io.StringIO("1 / 3\n0.1 + 0.2\n6 / 3\n"), output, backend="fraction")
+        results = [json.loads(line)["result"] for line in output.getvalue().splitlines()]
+        self.assertEqual(results, ["1/3", "3/10", 2])
+
+    def test_workers_keep_input_order(self):
+        self.assertEqual(self.run_lines(workers=2), self.run_lines(workers=1))
+
+    def test_results_are_written_before_more_input_arrives(self):
+        for workers in (1, 2):
+            output = io.StringIO()
+
+            def interactive():
+                # Like a producer that waits for each answer before sending the next line
+                yield "1 + 1\n"
+                deadline = time.monotonic() + 10
+                while not output.getvalue() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(len(output.getvalue().splitlines()), 1, f"no result written with workers={workers}")
+                yield "2 * 3\n"
+
+            self.assertEqual(run_batch(interactive(), output, workers), 0)
+            self.assertEqual([json.loads(line)["result"] for line in output.getvalue().splitlines()], [2, 6])
+
+    def test_bad_arguments_are_usage_errors(self):
+        for argv in (["--batch", "no_such_file.txt"], ["--batch", "--workers", "0"], ["--workers", "-2", "1 + 1"]):
+            with self.assertRaises(SystemExit) as raised, contextlib.redirect_stderr(io.StringIO()) as stderr:
+                parse_args(argv)
+            self.assertEqual(raised.exception.code, 2)
+            self.assertIn("error:", stderr.getvalue())
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generated_expressions_have_the_requested_shape(self):
+        calculator = Calculator()
+        expression = generate_expression(64, 8)
+        tokens = calculator._tokenize("".join(expression.split()))
+        self.assertEqual(sum(token[0].isdigit() for token in tokens), 64)
+        self.assertEqual(tokens.count("("), 8)
+        self.assertEqual(expression, generate_expression(64, 8))
+        calculator.evaluate(expression)
+
+    def test_regressions_are_reported(self):
+        baseline = {"case": {"ops_per_sec": 1000.0, "peak_bytes": 1000}}
+        self.assertEqual(check({"case": {"ops_per_sec": 600.0, "peak_bytes": 1100}}, baseline, 1.0, 0.1), [])
+        problems = check({"case": {"ops_per_sec": 400.0, "peak_bytes": 2000}}, baseline, 1.0, 0.1)
+        self.assertEqual(len(problems), 2)
+
+    def test_peak_bytes(self):
+        self.assertGreater(peak_bytes(lambda count: [bytearray(10000) for _ in range(count)]), 10000)
+
 
 if __name__ == "__main__":
     unittest.main()
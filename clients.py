@@ -0,0 +1,172 @@
+"""
+Pluggable model clients for the agent loop.
+
+The loop only needs a client exposing `models.generate_content`,
+`models.generate_content_stream`, `aio.models.generate_content` and
+(optionally) `caches`, which is the shape of `genai.Client`. Besides the real
+client this module provides:
+
+- RecordingClient: wraps another client and appends every request/response
+  pair to a JSONL transcript.
+- ReplayClient: serves a recorded transcript back without the network, with
+  an optional artificial latency per call, for offline tests and benchmarks.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Optional
+
+# The SDK is imported where it is used, so importing this module (and --help) stays cheap
+if TYPE_CHECKING:
+    from google.genai import types
+
+
+def _dump(model) -> dict:
+    return model.model_dump(mode="json", exclude_none=True)
+
+
+def request_key(contents) -> str:
+    """Hash the contents of a request so replays can match it to a recording."""
+    payload = json.dumps([_dump(content) for content in contents], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingClient:
+    """Wraps a client and records every model call to a JSONL transcript."""
+
+    def __init__(self, client, path: str):
+        self._client = client
+        self.path = path
+        self._lock = threading.Lock()
+        self.models = SimpleNamespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+        )
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self._generate_content_async),
+            aclose=client.aio.aclose,
+        )
+        self.caches = client.caches
+
+    def _record(self, model, contents, **response):
+        entry = {"model": model, "request": request_key(contents), **response}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _generate_content(self, *, model, contents, config=None):
+        response = self._client.models.generate_content(model=model, contents=contents, config=config)
+        self._record(model, contents, response=_dump(response))
+        return response
+
+    def _generate_content_stream(self, *, model, contents, config=None):
+        chunks = []
+        for chunk in self._client.models.generate_content_stream(model=model, contents=contents, config=config):
+            chunks.append(_dump(chunk))
+            yield chunk
+        self._record(model, contents, chunks=chunks)
+
+    async def _generate_content_async(self, *, model, contents, config=None):
+        response = await self._client.aio.models.generate_content(model=model, contents=contents, config=config)
+        self._record(model, contents, response=_dump(response))
+        return response
+
+
+class ReplayClient:
+    """Serves recorded responses deterministically instead of calling the API.
+
+    Each call is answered with the first unused recording made for identical
+    request contents, or else the next unused recording in transcript order.
+    """
+
+    def __init__(self, transcript, latency: float = 0.0):
+        if isinstance(transcript, str):
+            with open(transcript, encoding="utf-8") as f:
+                transcript = [json.loads(line) for line in f if line.strip()]
+        self._entries = list(transcript)
+        self._used = [False] * len(self._entries)
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.calls = 0
+        self.models = SimpleNamespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+        )
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self._generate_content_async),
+            aclose=self._aclose,
+        )
+        self.caches = SimpleNamespace(create=self._unsupported, update=self._unsupported, delete=self._unsupported)
+
+    def _unsupported(self, **kwargs):
+        raise NotImplementedError("context caching is not available when replaying")
+
+    async def _aclose(self):
+        pass
+
+    def _next_entry(self, contents) -> dict:
+        key = request_key(contents)
+        with self._lock:
+            self.calls += 1
+            unused = [index for index, used in enumerate(self._used) if not used]
+            if not unused:
+                raise RuntimeError("replay transcript exhausted")
+            index = next((i for i in unused if self._entries[i].get("request") == key), unused[0])
+            self._used[index] = True
+            return self._entries[index]
+
+    @staticmethod
+    def _as_response(entry) -> "types.GenerateContentResponse":
+        from google.genai import types
+
+        if "response" in entry:
+            return types.GenerateContentResponse.model_validate(entry["response"])
+        # A streamed recording replayed without streaming: join the chunks
+        chunks = [types.GenerateContentResponse.model_validate(chunk) for chunk in entry["chunks"]]
+        parts = [
+            part
+            for chunk in chunks if chunk.candidates and chunk.candidates[0].content
+            for part in chunk.candidates[0].content.parts or []
+        ]
+        usage_metadata = next((chunk.usage_metadata for chunk in reversed(chunks) if chunk.usage_metadata), None)
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=usage_metadata,
+        )
+
+    def _generate_content(self, *, model, contents, config=None):
+        entry = self._next_entry(contents)
+        time.sleep(self.latency)
+        return self._as_response(entry)
+
+    def _generate_content_stream(self, *, model, contents, config=None):
+        from google.genai import types
+
+        entry = self._next_entry(contents)
+        chunks = entry.get("chunks") or [entry["response"]]
+        for chunk in chunks:
+            time.sleep(self.latency / len(chunks))
+            yield types.GenerateContentResponse.model_validate(chunk)
+
+    async def _generate_content_async(self, *, model, contents, config=None):
+        import asyncio
+
+        entry = self._next_entry(contents)
+        await asyncio.sleep(self.latency)
+        return self._as_response(entry)
+
+
+def create_client(api_key: Optional[str] = None, record: Optional[str] = None,
+                  replay: Optional[str] = None, latency: float = 0.0):
+    """Build the client for a run: a replay of a transcript, or the live API, optionally recorded."""
+    if replay:
+        return ReplayClient(replay, latency=latency)
+
+    from google import genai
+
+    client = genai.Client(api_key=api_key)
+    if record:
+        return RecordingClient(client, record)
+    return client
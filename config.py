@@ -4,11 +4,8 @@ Centralizes all project settings and configuration values.
 """
 
 import os
+import tempfile
 from typing import Optional
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 
 class Config:
@@ -31,8 +28,10 @@ class Config:
 
     - List files and directories
 	- Read file contents
+	- Search file contents for text or regular expressions
 	- Execute Python files with optional arguments
 	- Write or overwrite files
+	- Edit files with search/replace blocks or a unified diff instead of rewriting them
 
     All paths you provide should be relative to the working directory. You do not need to specify the working directory in your function calls as it is automatically injected for security reasons.
     """
@@ -41,9 +40,42 @@ class Config:
     MAX_FILE_SIZE = 10000  # Maximum characters to read from a file
     DEFAULT_WORKING_DIRECTORY = os.getcwd()
     TIMEOUT = 30  # Default timeout in seconds for subprocess execution
+    PYTHON_WORKER_POOL = False  # Run scripts in children of a pre-warmed forkserver
+    PYTHON_POOL_PRELOAD = ["json", "re", "unittest", "argparse", "decimal", "fractions"]  # Imported once by the forkserver
+    MAX_OUTPUT_BYTES = 32000  # Bytes of stdout and of stderr kept per script run (head + tail)
+    ECHO_SCRIPT_OUTPUT = False  # Print script output lines to the console as they are produced
+    CACHE_PYTHON_RUNS = False  # Reuse run_python_file results while the workspace's Python sources are unchanged
+    RUN_CACHE_SIZE = 32  # run_python_file results kept when CACHE_PYTHON_RUNS is on
+    PREFETCH_FILES = False  # After a directory listing, read the small files it names into the tool cache
+    PREFETCH_MAX_FILES = 8  # Files prefetched per listing, smallest first
+    PREFETCH_MAX_FILE_BYTES = 10000  # Larger files are left for the model to ask for
+    PREFETCH_WORKERS = 2  # Threads reading prefetched files
+    
+    # Agent Loop Configuration
+    MAX_ITERATIONS = 20  # Maximum model turns per session to prevent infinite loops
+    MAX_TOOL_WORKERS = 4  # Tool calls from one model turn that may run concurrently
+    BATCH_CONCURRENCY = 8  # Sessions run at once by the batch entry point
+    TOOL_CACHE_SIZE = 256  # Read-only tool results kept in the LRU cache
+    USE_CONTEXT_CACHE = False  # Register system prompt and tools as server-side cached content
+    CONTEXT_CACHE_TTL = 3600  # Lifetime in seconds of the server-side context cache
+    MODEL_REQUESTS_PER_MINUTE = 0  # Model calls per minute shared by every session in the process (0 = no limit)
+    MODEL_TOKENS_PER_MINUTE = 0  # Estimated model tokens per minute shared the same way (0 = no limit)
+    MODEL_MAX_RETRIES = 5  # Retries of a model call after a 429, 5xx or dropped connection
+    MODEL_RETRY_BASE_DELAY = 1.0  # Seconds before the first retry; doubled (with jitter) each time
+    MODEL_RETRY_MAX_DELAY = 60.0  # Longest backoff between retries when the server gives no hint
+    DAEMON_SOCKET = os.environ.get("AGENT_DAEMON_SOCKET", os.path.join(tempfile.gettempdir(), "ai-agent.sock"))  # Unix socket of daemon.py
+    
+    # History Configuration
+    HISTORY_TOKEN_BUDGET = 32000  # Estimated prompt tokens before old tool outputs are elided
+    HISTORY_KEEP_RECENT_TURNS = 4  # Most recent messages that are never compacted
+    HISTORY_SUMMARY_CHARS = 400  # Characters kept from an elided tool output (head + tail)
+    PERSIST_SESSIONS = True  # Append every turn to an on-disk log that --resume can reload
+    SESSIONS_DIR = os.environ.get("AGENT_SESSIONS_DIR", ".sessions")  # Where session logs and their out-of-line payloads are stored
+    SESSION_BLOB_THRESHOLD = 2048  # Parts larger than this (in characters) are stored once by hash
     
     # Calculator Configuration
-    CALCULATOR_PRECISION = 10  # Decimal precision for calculations
+    CALCULATOR_BACKEND = os.environ.get("CALCULATOR_BACKEND", "float")  # float, decimal or fraction
+    CALCULATOR_PRECISION = int(os.environ.get("CALCULATOR_PRECISION", 10))  # Significant digits of the decimal backend
     
     # Logging Configuration
     VERBOSE_MODE = False
@@ -52,6 +84,9 @@ class Config:
     # Security Configuration
     ALLOWED_FILE_EXTENSIONS = ['.py', '.txt', '.md', '.json', '.yaml', '.yml', '.toml']
     MAX_DIRECTORY_DEPTH = 10  # Maximum directory traversal depth
+    MAX_LISTING_ENTRIES = 200  # Maximum entries returned by one directory listing page
+    SEARCH_MAX_RESULTS = 100  # Maximum matching lines returned by one search
+    SEARCH_MAX_FILE_BYTES = 1000000  # Larger files are left out of the search index
     
     @classmethod
     def validate_config(cls) -> bool:
@@ -76,13 +111,16 @@ class Config:
             "max_file_size": cls.MAX_FILE_SIZE,
             "working_directory": cls.DEFAULT_WORKING_DIRECTORY,
             "allowed_extensions": cls.ALLOWED_FILE_EXTENSIONS,
-            "max_directory_depth": cls.MAX_DIRECTORY_DEPTH
+            "max_directory_depth": cls.MAX_DIRECTORY_DEPTH,
+            "max_listing_entries": cls.MAX_LISTING_ENTRIES,
+            "search_max_results": cls.SEARCH_MAX_RESULTS
         }
     
     @classmethod
     def get_calculator_config(cls) -> dict:
         """Get calculator configuration."""
         return {
+            "backend": cls.CALCULATOR_BACKEND,
             "precision": cls.CALCULATOR_PRECISION
         }
 
@@ -109,14 +147,36 @@ def get_config(environment: str = "development") -> Config:
     return config_map.get(environment, Config)()
 
 
-# Environment-specific configuration
-ENVIRONMENT = os.environ.get("ENVIRONMENT", "development")
-config = get_config(ENVIRONMENT)
+def _export_settings():
+    """Pick the configuration for ENVIRONMENT and export its commonly used values."""
+    global ENVIRONMENT, config, API_KEY, MODEL_NAME, MAX_FILE_CHARS, DEFAULT_WORKING_DIR, SYSTEM_PROMPT, WORKING_DIR, MAX_ITERATIONS
+    ENVIRONMENT = os.environ.get("ENVIRONMENT", "development")
+    config = get_config(ENVIRONMENT)
+    API_KEY = config.GEMINI_API_KEY
+    MODEL_NAME = config.GEMINI_MODEL
+    MAX_FILE_CHARS = config.MAX_FILE_SIZE
+    DEFAULT_WORKING_DIR = config.DEFAULT_WORKING_DIRECTORY
+    SYSTEM_PROMPT = config.SYSTEM_PROMPT
+    WORKING_DIR = config.WORKING_DIR
+    MAX_ITERATIONS = config.MAX_ITERATIONS
+
 
-# Export commonly used values for convenience
-API_KEY = config.GEMINI_API_KEY
-MODEL_NAME = config.GEMINI_MODEL
-MAX_FILE_CHARS = config.MAX_FILE_SIZE
-DEFAULT_WORKING_DIR = config.DEFAULT_WORKING_DIRECTORY
-SYSTEM_PROMPT = config.SYSTEM_PROMPT
-WORKING_DIR = config.WORKING_DIR
\ No newline at end of file
+# Environment-specific configuration, and commonly used values exported for convenience
+_export_settings()
+
+def load_environment():
+    """Load variables from .env into os.environ and refresh the settings read from them.
+
+    Entry points call this after parsing their arguments, so --help and usage
+    errors return without reading .env. Modules that imported an exported
+    value by name keep the value they imported.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    Config.GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    Config.DAEMON_SOCKET = os.environ.get("AGENT_DAEMON_SOCKET", Config.DAEMON_SOCKET)
+    Config.SESSIONS_DIR = os.environ.get("AGENT_SESSIONS_DIR", Config.SESSIONS_DIR)
+    Config.CALCULATOR_BACKEND = os.environ.get("CALCULATOR_BACKEND", Config.CALCULATOR_BACKEND)
+    Config.CALCULATOR_PRECISION = int(os.environ.get("CALCULATOR_PRECISION", Config.CALCULATOR_PRECISION))
+    _export_settings()
@@ -0,0 +1,289 @@
+"""
+Long-lived agent daemon and its thin client.
+
+Usage:
+    python daemon.py serve [--socket PATH] [--python-pool] [--context-cache] ...
+    python daemon.py ask "Run the calculator tests" [--stream] [--verbose] [--resume ID]
+    python daemon.py stop
+
+`serve` pays the startup costs once: it imports the SDK, builds one client
+(whose HTTP connection pool stays warm between prompts) and optionally the
+interpreter pool and context cache. It then answers prompts sent over a Unix
+socket, each in its own thread. `ask` imports nothing but the standard library,
+the config module and python-dotenv, so a scripted caller pays little more
+than a socket round trip.
+
+The protocol is one JSON object per line. The client sends a request
+({"prompt", "stream", "verbose", "resume"} or {"command": "shutdown"}); the
+daemon streams back {"type": "output", "text"} messages with everything the
+agent prints, then one {"type": "result", "response", "session"} or
+{"type": "error", "error"} message.
+"""
+
+import argparse
+import contextvars
+import io
+import json
+import os
+import socket
+import sys
+import threading
+
+from config import Config, load_environment
+
+# Where the current request's output goes; unset means the daemon's own console
+_output = contextvars.ContextVar("daemon_output", default=None)
+
+
+class _RoutedStdout(io.TextIOBase):
+    """sys.stdout replacement that sends each request's prints back to its client.
+
+    Output is sent a whole line at a time per thread (or on flush), so prints
+    from concurrent tool calls don't interleave mid-line.
+    """
+
+    def __init__(self, console):
+        self._console = console
+        self._pending = threading.local()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        send = _output.get()
+        if send is None:
+            return self._console.write(text)
+        lines, newline, rest = (getattr(self._pending, "text", "") + text).rpartition("\n")
+        if newline:
+            send(lines + newline)
+        self._pending.text = rest
+        return len(text)
+
+    def flush(self):
+        send = _output.get()
+        if send is None:
+            self._console.flush()
+            return
+        rest = getattr(self._pending, "text", "")
+        if rest:
+            self._pending.text = ""
+            send(rest)
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return sock
+
+
+# --- Server ---
+
+def serve(args):
+    import socketserver
+
+    from clients import create_client
+    from functions import interpreter_pool
+    from main import (
+        enable_context_cache, get_available_functions, get_request_config, refresh_context_cache, run_agent, start_session,
+    )
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key and not args.replay:
+        print("Error: GEMINI_API_KEY environment variable not set.")
+        sys.exit(1)
+
+    client = create_client(api_key, record=args.record, replay=args.replay, latency=args.replay_latency)
+    context_cache = enable_context_cache(client, args.verbose) if args.context_cache else None
+    Config.CACHE_PYTHON_RUNS = args.cache_runs
+    Config.PREFETCH_FILES = args.prefetch
+    Config.MODEL_REQUESTS_PER_MINUTE = args.rpm
+    Config.MODEL_TOKENS_PER_MINUTE = args.tpm
+    if args.python_pool and interpreter_pool.is_supported():
+        Config.PYTHON_WORKER_POOL = True
+        interpreter_pool.get_pool(Config.PYTHON_POOL_PRELOAD)
+    get_available_functions()
+    get_request_config()
+
+    stopped = threading.Event()
+
+    def keep_context_cache():
+        """Extend the context cache halfway through each TTL, so it never expires under a running daemon."""
+        nonlocal context_cache
+        while context_cache is not None and not stopped.wait(Config.CONTEXT_CACHE_TTL / 2):
+            context_cache = refresh_context_cache(client, context_cache, args.verbose)
+
+    if context_cache is not None:
+        threading.Thread(target=keep_context_cache, daemon=True).start()
+
+    def answer(request, send):
+        """Run one prompt, streaming its output through send."""
+        verbose = bool(request.get("verbose"))
+        token = _output.set(lambda text: send({"type": "output", "text": text}))
+        try:
+            messages, session = start_session(request.get("prompt") or "", request.get("resume"), verbose)
+            response = run_agent(client, messages, verbose, stream=bool(request.get("stream")), session=session)
+            session_id = session.session_id if session else None
+            sys.stdout.flush()
+            if response is None:
+                send({"type": "error", "error": "Reached maximum number of iterations", "session": session_id})
+            else:
+                send({"type": "result", "response": response, "session": session_id})
+        except Exception as e:
+            sys.stdout.flush()
+            send({"type": "error", "error": str(e) or type(e).__name__})
+        finally:
+            sys.stdout.flush()
+            _output.reset(token)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lock = threading.Lock()
+            connected = True
+
+            def send(message):
+                nonlocal connected
+                if not connected:
+                    return
+                data = (json.dumps(message) + "\n").encode("utf-8")
+                with lock:
+                    try:
+                        self.wfile.write(data)
+                        self.wfile.flush()
+                    except OSError:
+                        # The client went away; finish the session without it
+                        connected = False
+
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError as e:
+                send({"type": "error", "error": f"invalid request: {e}"})
+                return
+            if request.get("command") == "shutdown":
+                send({"type": "result", "response": "Daemon stopping."})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            if not request.get("prompt") and not request.get("resume"):
+                send({"type": "error", "error": "A prompt is required."})
+                return
+            answer(request, send)
+
+    # A socket file nobody listens on is left over from a daemon that died
+    if os.path.exists(args.socket):
+        try:
+            _connect(args.socket).close()
+            print(f"Error: A daemon is already listening on {args.socket}.")
+            sys.exit(1)
+        except OSError:
+            os.unlink(args.socket)
+
+    socketserver.ThreadingUnixStreamServer.daemon_threads = True
+    old_umask = os.umask(0o077)  # Only the current user may connect
+    try:
+        server = socketserver.ThreadingUnixStreamServer(args.socket, Handler)
+    finally:
+        os.umask(old_umask)
+
+    sys.stdout = _RoutedStdout(sys.stdout)
+    print(f"Agent daemon listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        if context_cache is not None:
+            client.caches.delete(name=context_cache.name)
+        print("Agent daemon stopped.")
+
+
+# --- Client ---
+
+def request(path, message, on_output=None) -> dict:
+    """Send one request to the daemon and return its final message.
+
+    on_output is called with each piece of output the agent prints.
+    """
+    with _connect(path) as sock, sock.makefile("rwb") as stream:
+        stream.write((json.dumps(message) + "\n").encode("utf-8"))
+        stream.flush()
+        for line in stream:
+            reply = json.loads(line)
+            if reply["type"] == "output":
+                if on_output:
+                    on_output(reply["text"])
+                continue
+            return reply
+    return {"type": "error", "error": "daemon closed the connection without answering"}
+
+
+def ask(args):
+    prompt = " ".join(args.prompt)
+    if not prompt and not args.resume:
+        print("Error: A prompt argument is required.")
+        sys.exit(1)
+
+    def echo(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    message = {"prompt": prompt, "stream": args.stream, "verbose": args.verbose, "resume": args.resume}
+    try:
+        reply = request(args.socket, message, echo)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        print(f"Error: Could not reach the agent daemon on {args.socket} ({e}). Start it with: python daemon.py serve")
+        sys.exit(1)
+
+    if reply["type"] == "error":
+        print(f"\nAn error occurred: {reply['error']}")
+        sys.exit(1)
+    if not args.stream:
+        print("Final response:")
+        print(reply["response"])
+
+
+def stop(args):
+    try:
+        print(request(args.socket, {"command": "shutdown"})["response"])
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No agent daemon is listening on {args.socket}.")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Long-lived agent daemon and client.")
+    parser.add_argument("--socket", help="Unix socket of the daemon (default: AGENT_DAEMON_SOCKET or Config.DAEMON_SOCKET)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Start the daemon")
+    serve_parser.add_argument("--verbose", action="store_true", help="Print daemon-level diagnostics")
+    serve_parser.add_argument("--context-cache", action="store_true", help="Send the system prompt and tools as cached content")
+    serve_parser.add_argument("--python-pool", action="store_true", help="Run scripts in children of a pre-warmed interpreter")
+    serve_parser.add_argument("--cache-runs", action="store_true", help="Reuse script results while sources are unchanged")
+    serve_parser.add_argument("--prefetch", action="store_true", help="Read small files named by a listing into the tool cache in the background")
+    serve_parser.add_argument("--rpm", type=int, default=Config.MODEL_REQUESTS_PER_MINUTE, metavar="N", help="Model requests per minute for all prompts together (0 = no limit)")
+    serve_parser.add_argument("--tpm", type=int, default=Config.MODEL_TOKENS_PER_MINUTE, metavar="N", help="Estimated model tokens per minute for all prompts together (0 = no limit)")
+    serve_parser.add_argument("--record", metavar="PATH", help="Record model calls to a JSONL transcript")
+    serve_parser.add_argument("--replay", metavar="PATH", help="Answer model calls from a recorded transcript")
+    serve_parser.add_argument("--replay-latency", type=float, default=0.0, metavar="SECONDS")
+
+    ask_parser = commands.add_parser("ask", help="Send a prompt to the daemon")
+    ask_parser.add_argument("prompt", nargs="*", help="The prompt to send to the agent")
+    ask_parser.add_argument("--verbose", action="store_true", help="Print messages, tool calls and token usage")
+    ask_parser.add_argument("--stream", action="store_true", help="Print model output as it is generated")
+    ask_parser.add_argument("--resume", metavar="SESSION_ID", help="Continue a saved session")
+
+    commands.add_parser("stop", help="Stop the daemon")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    load_environment()
+    args.socket = args.socket or Config.DAEMON_SOCKET
+    {"serve": serve, "ask": ask, "stop": stop}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
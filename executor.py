@@ -0,0 +1,125 @@
+"""
+Concurrent execution of the tool calls returned in a single model turn.
+
+Calls that don't conflict run at the same time on a shared thread pool;
+calls that do (e.g. a write and a read of the same path) run in the order
+the model issued them. Results always come back in the original order.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from config import Config
+from tracing import tracer
+
+# How each tool touches the working directory. "read" and "write" act on the
+# path named by the given argument, "workspace" may read any file in it.
+TOOL_ACCESS = {
+    "get_files_info": ("read", "directory"),
+    "get_file_content": ("read", "file_path"),
+    "search_files": ("read", "directory"),
+    "write_file": ("write", "file_path"),
+    "edit_file": ("write", "file_path"),
+    "run_python_file": ("workspace", None),
+}
+
+
+def tool_access(function_call_part) -> tuple:
+    """Return the (mode, normalized path) a tool call needs in the working directory."""
+    mode, path_arg = TOOL_ACCESS.get(function_call_part.name, ("workspace", None))
+    if path_arg is None:
+        return mode, None
+    args = dict(function_call_part.args or {})
+    return mode, os.path.normpath(str(args.get(path_arg) or "."))
+
+
+def paths_overlap(a: str, b: str) -> bool:
+    """Check whether one normalized relative path is the same as or inside the other."""
+    if a == "." or b == "." or a == b:
+        return True
+    return a.startswith(b + os.sep) or b.startswith(a + os.sep)
+
+
+def calls_conflict(first: tuple, second: tuple) -> bool:
+    """Check whether two tool accesses must run in order."""
+    (mode_a, path_a), (mode_b, path_b) = first, second
+    if "write" not in (mode_a, mode_b):
+        return False
+    if path_a is None or path_b is None:
+        return True
+    return paths_overlap(path_a, path_b)
+
+
+class ToolCallBatch:
+    """The tool calls of one model turn, started as they are submitted."""
+
+    def __init__(self, pool: ThreadPoolExecutor, call: Callable):
+        self._pool = pool
+        self._call = call
+        self._submitted = []
+
+    def submit(self, function_call_part):
+        """Schedule a call behind every earlier call in this batch it conflicts with."""
+        access = tool_access(function_call_part)
+        depends_on = [
+            future for earlier, future in self._submitted if calls_conflict(earlier, access)
+        ]
+        # Run in a copy of the caller's context so context variables (such as
+        # where a daemon request's output goes) follow the call to its worker
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, self._run, function_call_part, depends_on, time.perf_counter())
+        self._submitted.append((access, future))
+        return future
+
+    def _run(self, function_call_part, depends_on, submitted):
+        # The pool hands out work in FIFO order, so every dependency has
+        # already been picked up by a worker and this wait cannot deadlock.
+        wait(depends_on)
+        tracer.record("queue", function_call_part.name, submitted, time.perf_counter(),
+                      waited_on=len(depends_on))
+        return self._call(function_call_part)
+
+    def results(self) -> list:
+        """Wait for all submitted calls and return their results in submission order."""
+        return [future.result() for _, future in self._submitted]
+
+
+class ToolExecutor:
+    """Thread pool shared by all turns of the agent loop."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max(1, max_workers or Config.MAX_TOOL_WORKERS)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="tool-call"
+        )
+
+    def batch(self, call: Callable) -> ToolCallBatch:
+        """Start a new batch whose calls are dispatched through `call`."""
+        return ToolCallBatch(self._pool, call)
+
+    def run(self, function_calls, call: Callable) -> list:
+        """Run all function calls of a turn and return their results in order."""
+        batch = self.batch(call)
+        for function_call_part in function_calls:
+            batch.submit(function_call_part)
+        return batch.results()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ToolExecutor:
+    """Return the process-wide tool executor, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ToolExecutor()
+        return _executor
@@ -0,0 +1,178 @@
+import os
+import re
+
+from functions.write_file import atomic_write
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditError(Exception):
+    """An edit that does not apply cleanly to the current file content."""
+
+
+def _apply_replacements(content, edits):
+    """Apply search/replace blocks in order. Returns (content, [(line, removed, added)])."""
+    changes = []
+    for number, edit in enumerate(edits, start=1):
+        search = edit.get("search") or ""
+        replace = edit.get("replace") or ""
+        if not search:
+            raise EditError(f"edit {number} has an empty search block")
+        count = content.count(search)
+        if count == 0:
+            raise EditError(f"edit {number}: search block not found")
+        if count > 1:
+            raise EditError(f"edit {number}: search block matches {count} times; include more surrounding lines")
+        index = content.index(search)
+        content = content[:index] + replace + content[index + len(search):]
+        changes.append((content.count("\n", 0, index) + 1, search.count("\n") + 1, replace.count("\n") + 1 if replace else 0))
+    return content, changes
+
+
+def _parse_hunks(diff):
+    """Split a unified diff into (old start, old lines, new lines) hunks. File headers are ignored."""
+    hunks = []
+    current = None
+    for line in diff.splitlines():
+        header = HUNK_HEADER.match(line)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+        elif current is None or line.startswith("\\"):
+            continue
+        elif line.startswith("-"):
+            current[1].append(line[1:])
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+        elif line.startswith(" ") or line == "":
+            current[1].append(line[1:])
+            current[2].append(line[1:])
+        else:
+            raise EditError(f"unexpected line in diff: {line[:60]!r}")
+    if not hunks:
+        raise EditError("diff contains no @@ hunks")
+    return hunks
+
+
+def _find_block(lines, block, expected):
+    """Find block in lines, trying the expected position first and then moving outward."""
+    if not block:
+        return min(max(expected, 0), len(lines))
+    for distance in range(len(lines) + 1):
+        for start in (expected - distance, expected + distance):
+            if 0 <= start <= len(lines) - len(block) and lines[start:start + len(block)] == block:
+                return start
+    return None
+
+
+def _apply_diff(content, diff):
+    """Apply a unified diff. Returns (content, [(line, removed, added)])."""
+    newline = "\r\n" if "\r\n" in content else "\n"
+    trailing_newline = content.endswith(("\n", "\r\n")) or not content
+    lines = content.splitlines()
+    changes = []
+    delta = 0
+    for number, (old_start, old_lines, new_lines) in enumerate(_parse_hunks(diff), start=1):
+        # A pure insertion "-N,0" goes after line N; anything else starts at line N
+        expected = old_start + delta if not old_lines else old_start - 1 + delta
+        start = _find_block(lines, old_lines, expected)
+        if start is None:
+            raise EditError(f"hunk {number} (at line {old_start}) does not match the file")
+        lines[start:start + len(old_lines)] = new_lines
+        delta += len(new_lines) - len(old_lines)
+
+        # Report only the lines that actually changed, not the surrounding context
+        prefix = 0
+        while prefix < min(len(old_lines), len(new_lines)) and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < min(len(old_lines), len(new_lines)) - prefix
+               and old_lines[-1 - suffix] == new_lines[-1 - suffix]):
+            suffix += 1
+        changes.append((start + prefix + 1, len(old_lines) - prefix - suffix, len(new_lines) - prefix - suffix))
+    return newline.join(lines) + (newline if trailing_newline and lines else ""), changes
+
+
+def edit_file(working_directory, file_path, edits=None, diff=None):
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+
+    if not abs_file_path.startswith(abs_working_dir):
+        return f'Error: Cannot edit "{file_path}" as it is outside the permitted working directory'
+
+    if not os.path.isfile(abs_file_path):
+        return f'Error: File "{file_path}" does not exist; use write_file to create it'
+
+    if bool(edits) == bool(diff):
+        return 'Error: Provide either edits (search/replace blocks) or diff (a unified diff), but not both'
+
+    try:
+        with open(abs_file_path, encoding='utf-8', newline='') as f:
+            content = f.read()
+
+        if edits:
+            new_content, changes = _apply_replacements(content, [dict(edit) for edit in edits])
+        else:
+            new_content, changes = _apply_diff(content, diff)
+
+        if new_content == content:
+            return f'No changes made to "{file_path}"'
+        atomic_write(abs_file_path, new_content)
+
+        removed = sum(change[1] for change in changes)
+        added = sum(change[2] for change in changes)
+        locations = ", ".join(f"line {change[0]}" for change in changes)
+        return (
+            f'Successfully edited "{file_path}": {len(changes)} change(s) at {locations} '
+            f'(-{removed} +{added} lines, now {len(new_content.splitlines())} lines)'
+        )
+
+    except EditError as e:
+        return f'Error: Edit to "{file_path}" does not apply cleanly, file unchanged: {e}'
+    except Exception as e:
+        return f'Error: {e}'
+
+
+def schema_edit_file():
+    from google.genai import types
+
+    return types.FunctionDeclaration(
+        name="edit_file",
+        description=(
+            "Edits an existing file within the working directory without resending its whole content. "
+            "Pass either search/replace blocks (each search block must match exactly once) or a unified diff. "
+            "The edit is applied only if it matches the file, and the file is replaced atomically."
+        ),
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "file_path": types.Schema(
+                    type=types.Type.STRING,
+                    description="Path to the file to edit, relative to the working directory.",
+                ),
+                "edits": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(
+                        type=types.Type.OBJECT,
+                        properties={
+                            "search": types.Schema(
+                                type=types.Type.STRING,
+                                description="Exact text to find, including enough surrounding lines to be unique.",
+                            ),
+                            "replace": types.Schema(
+                                type=types.Type.STRING,
+                                description="Text to put in its place.",
+                            ),
+                        },
+                        required=["search", "replace"],
+                    ),
+                    description="Search/replace blocks, applied in order.",
+                ),
+                "diff": types.Schema(
+                    type=types.Type.STRING,
+                    description="A unified diff (with @@ hunk headers) to apply instead of edits.",
+                ),
+            },
+            required=["file_path"],
+        ),
+    )
@@ -1,37 +1,124 @@
+import mmap
 import os
 
-from google.genai import types
-
 from config import MAX_FILE_CHARS
 
+# Newlines are counted a chunk at a time so large files are scanned in C
+SCAN_CHUNK_SIZE = 1 << 20
+
+
+def _count_lines(mm, start, end):
+    """Count newlines in mm[start:end]."""
+    count = 0
+    for chunk_start in range(start, end, SCAN_CHUNK_SIZE):
+        count += mm[chunk_start:min(chunk_start + SCAN_CHUNK_SIZE, end)].count(b"\n")
+    return count
+
+
+def _line_offset(mm, line_number):
+    """Return the byte offset where a 1-based line starts, or len(mm) if the file is shorter."""
+    remaining = line_number - 1
+    position = 0
+    size = len(mm)
+    # Skip whole chunks that end before the line we want
+    while remaining and position < size:
+        chunk_end = min(position + SCAN_CHUNK_SIZE, size)
+        newlines = mm[position:chunk_end].count(b"\n")
+        if newlines >= remaining:
+            break
+        remaining -= newlines
+        position = chunk_end
+    while remaining and position < size:
+        position = mm.find(b"\n", position, size)
+        if position == -1:
+            return size
+        position += 1
+        remaining -= 1
+    return min(position, size)
+
+
+def _total_lines(mm):
+    size = len(mm)
+    newlines = _count_lines(mm, 0, size)
+    return newlines + (1 if size and mm[size - 1:size] != b"\n" else 0)
+
+
+def _read_range(abs_path, file_path, offset, length, start_line, end_line):
+    size = os.path.getsize(abs_path)
+    if size == 0:
+        return f"[File {file_path} is empty]"
+
+    with open(abs_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start_line is not None or end_line is not None:
+            start_line = int(start_line or 1)
+            if start_line < 1:
+                return f'Error: start_line must be 1 or greater, got {start_line}'
+            if end_line is not None and int(end_line) < start_line:
+                return f'Error: end_line ({end_line}) is before start_line ({start_line})'
+            start = _line_offset(mm, start_line)
+            end = size if end_line is None else _line_offset(mm, int(end_line) + 1)
+        else:
+            start = int(offset or 0)
+            if start < 0:
+                return f'Error: offset must be 0 or greater, got {start}'
+            end = size if length is None else start + max(0, int(length))
+
+        if start >= size:
+            return f'Error: Requested range starts past the end of "{file_path}" ({size} bytes, {_total_lines(mm)} lines)'
+
+        end = min(end, size, start + MAX_FILE_CHARS)
+        content = mm[start:end].decode("utf-8", errors="replace")
+        first_line = _count_lines(mm, 0, start) + 1
+        last_line = first_line + _count_lines(mm, start, max(start, end - 1))
+        return (
+            f"{content}\n[File {file_path}: bytes {start}-{end} of {size}, "
+            f"lines {first_line}-{last_line} of {_total_lines(mm)}]"
+        )
 
-def get_file_content(working_directory, file_path):
+
+def get_file_content(working_directory, file_path, offset=None, length=None, start_line=None, end_line=None):
     abs_working_dir = os.path.abspath(working_directory)
     abs_target_file_path = os.path.abspath(os.path.join(working_directory, file_path))
-    
+
     if not abs_target_file_path.startswith(abs_working_dir):
         return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
-    
+
     if not os.path.exists(abs_target_file_path):
         return f'Error: "{abs_target_file_path}" does not exist'
-    
+
     if not os.path.isfile(abs_target_file_path):
         return f'Error: File not found or is not a regular file: "{abs_target_file_path}"'
-    
+
     try:
+        if any(arg is not None for arg in (offset, length, start_line, end_line)):
+            return _read_range(abs_target_file_path, file_path, offset, length, start_line, end_line)
+
         with open(abs_target_file_path, 'r') as file:
             content = file.read(MAX_FILE_CHARS)
-            if os.path.getsize(abs_target_file_path) > MAX_FILE_CHARS:
-                content += f"[...File {file_path} truncated at {MAX_FILE_CHARS} characters]"
+            size = os.path.getsize(abs_target_file_path)
+            if size > MAX_FILE_CHARS:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    total_lines = _total_lines(mm)
+                content += (
+                    f"[...File {file_path} truncated at {MAX_FILE_CHARS} characters; "
+                    f"{size} bytes, {total_lines} lines in total. Use offset/length or "
+                    f"start_line/end_line to read the rest]"
+                )
             return content
     except Exception as e:
         return f'Error reading file "{file_path}": {e}'
 
 
 def schema_get_file_content():
+    from google.genai import types
+
     return types.FunctionDeclaration(
         name="get_file_content",
-	    description=f"Reads and returns the first {MAX_FILE_CHARS} characters of the content from a specified file within the working directory.",
+	    description=(
+            f"Reads and returns the first {MAX_FILE_CHARS} characters of the content from a specified file within the working directory. "
+            "Pass offset/length (bytes) or start_line/end_line to read any part of a larger file; ranged reads "
+            f"return at most {MAX_FILE_CHARS} bytes and report the file's total size and line count."
+        ),
         parameters=types.Schema(
             type=types.Type.OBJECT,
             properties={
@@ -39,6 +126,22 @@ def schema_get_file_content():
                     type=types.Type.STRING,
                     description="The path to the file whose content should be read, relative to the working directory.",
                 ),
+                "offset": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Byte offset to start reading from.",
+                ),
+                "length": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Number of bytes to read from offset.",
+                ),
+                "start_line": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="First line to read (1-based). Takes precedence over offset/length.",
+                ),
+                "end_line": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Last line to read (inclusive). Defaults to the end of the file.",
+                ),
             },
 	        required=["file_path"],
         ),
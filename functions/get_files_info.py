@@ -1,47 +1,104 @@
+import fnmatch
+import itertools
 import os
-from google.genai import types
 
+from config import Config
 
-def get_files_info(working_directory, directory="."):
+
+def _walk(abs_dir, prefix, depth, max_depth):
+    """Yield (relative name, DirEntry) in sorted, depth-first order."""
+    with os.scandir(abs_dir) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        name = f"{prefix}{entry.name}"
+        yield name, entry
+        if depth < max_depth:
+            try:
+                # Symlinked directories are listed but not followed, so a link loop can't repeat the tree
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if is_dir:
+                try:
+                    yield from _walk(entry.path, f"{name}/", depth + 1, max_depth)
+                except OSError:
+                    # Unreadable subdirectories are listed but not descended into
+                    pass
+
+
+def _matches(name, pattern, extensions):
+    if pattern and not (fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(os.path.basename(name), pattern)):
+        return False
+    if extensions and not name.endswith(tuple(extensions)):
+        return False
+    return True
+
+
+def get_files_info(working_directory, directory=".", recursive=False, max_depth=None,
+                   pattern=None, extensions=None, cursor=None, limit=None):
     # Create the full path by joining working_directory and directory
     full_path = os.path.join(working_directory, directory)
-    
+
     # Resolve the absolute paths to handle any relative path components
     abs_working_dir = os.path.abspath(working_directory)
     abs_target_dir = os.path.abspath(full_path)
-    
+
     # Validate that the target directory is within the working directory boundaries
     if not abs_target_dir.startswith(abs_working_dir):
         return f'Error: Cannot list "{directory}" as it is outside the permitted working directory'
-    
+
     # Check if the target path exists and is a directory
     if not os.path.exists(abs_target_dir):
         return f'Error: "{directory}" does not exist'
-    
+
     if not os.path.isdir(abs_target_dir):
         return f'Error: "{directory}" is not a directory'
-    
+
+    try:
+        offset = int(cursor) if cursor else 0
+        if offset < 0:
+            raise ValueError
+    except ValueError:
+        return f'Error: Invalid cursor "{cursor}"'
+
+    # Depth 1 is the directory's own entries; recursion never goes past the configured limit
+    depth_limit = 1
+    if recursive:
+        depth_limit = min(int(max_depth or Config.MAX_DIRECTORY_DEPTH), Config.MAX_DIRECTORY_DEPTH)
+    limit = max(1, min(int(limit or Config.MAX_LISTING_ENTRIES), Config.MAX_LISTING_ENTRIES))
+    extensions = [ext if ext.startswith(".") else f".{ext}" for ext in extensions or []]
+
     # If validation passes, get directory contents and build the output string
     try:
-        items = os.listdir(abs_target_dir)
-        # items.sort()  # Sort for consistent output
-        
+        entries = (
+            (name, entry)
+            for name, entry in _walk(abs_target_dir, "", 1, depth_limit)
+            if _matches(name, pattern, extensions)
+        )
+        # Read one entry past the page to know whether there is another page
+        page = list(itertools.islice(entries, offset, offset + limit + 1))
+
         output_lines = []
-        for item in items:
+        for name, entry in page[:limit]:
             try:
-                item_path = os.path.join(abs_target_dir, item)
-                file_size = os.path.getsize(item_path)
-                is_dir = os.path.isdir(item_path)
-                
+                # scandir already knows the entry type, so only the size needs a stat
+                file_size = entry.stat().st_size
+                is_dir = entry.is_dir()
+
                 output_lines.append(
-	                f"- {item}: file_size={file_size} bytes, is_dir={is_dir}"
+	                f"- {name}: file_size={file_size} bytes, is_dir={is_dir}"
                 )
             except (OSError, IOError) as e:
                 # If we can't get info for a specific item, skip it but continue with others
-                output_lines.append(f"- {item}: Error: {e}")
-        
+                output_lines.append(f"- {name}: Error: {e}")
+
+        if len(page) > limit:
+            output_lines.append(
+                f'[...More entries available; call again with cursor="{offset + limit}" to continue]'
+            )
+
         return "\n".join(output_lines)
-    
+
     except PermissionError:
         return f'Error: Permission denied accessing "{directory}"'
     except OSError as e:
@@ -50,9 +107,14 @@ def get_files_info(working_directory, directory="."):
         return f'Error: {e}'
 
 def schema_get_files_info():
+    from google.genai import types
+
     return types.FunctionDeclaration(
         name="get_files_info",
-        description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
+        description=(
+            "Lists files in the specified directory along with their sizes, constrained to the working directory. "
+            f"Results are sorted and paginated ({Config.MAX_LISTING_ENTRIES} entries per page at most)."
+        ),
         parameters=types.Schema(
             type=types.Type.OBJECT,
             properties={
@@ -60,6 +122,31 @@ def schema_get_files_info():
                     type=types.Type.STRING,
                     description="The directory to list files from, relative to the working directory. If not provided, lists files in the working directory itself.",
                 ),
+                "recursive": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Whether to include the contents of subdirectories. Entries are then shown with paths relative to the listed directory.",
+                ),
+                "max_depth": types.Schema(
+                    type=types.Type.INTEGER,
+                    description=f"How many directory levels to descend when recursive (at most {Config.MAX_DIRECTORY_DEPTH}).",
+                ),
+                "pattern": types.Schema(
+                    type=types.Type.STRING,
+                    description="Optional glob pattern (e.g. \"*.py\" or \"pkg/*\") that entry names or paths must match.",
+                ),
+                "extensions": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(type=types.Type.STRING),
+                    description="Optional list of file extensions to include, e.g. [\".py\", \".txt\"].",
+                ),
+                "cursor": types.Schema(
+                    type=types.Type.STRING,
+                    description="Cursor returned by a previous call to fetch the next page of entries.",
+                ),
+                "limit": types.Schema(
+                    type=types.Type.INTEGER,
+                    description=f"Maximum number of entries to return (at most {Config.MAX_LISTING_ENTRIES}).",
+                ),
             },
         ),
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,315 @@
+"""
+Pre-warmed interpreter for run_python_file.
+
+A long-lived server interpreter is started once with commonly used modules
+already imported. Every script then runs in its own child forked from that
+server: each call gets a clean process (fresh globals, its own cwd, argv,
+sys.path and output pipes) but skips interpreter startup and the preloaded
+imports. Output goes through FIFOs that the agent drains as the script
+runs, so captures can bound what they keep instead of a file growing on
+disk.
+
+The server is this file run as a script, so it must only import the
+standard library. It talks to the agent over its stdin/stdout with one JSON
+message per line:
+
+    request   {"id": 1, "file_path": ..., "args": [...], "cwd": ..., "stdout_path": ..., "stderr_path": ...}
+    started   {"id": 1, "pid": 1234}
+    finished  {"id": 1, "returncode": 0}
+"""
+
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+def is_supported() -> bool:
+    return hasattr(os, "fork")
+
+
+# --- Server side (runs in the pre-warmed interpreter) ---
+
+def _run_child(request: dict, close_fds: List[int]):
+    """Child entry point: run a script as __main__ with its output sent to the given FIFOs."""
+    import runpy
+    import traceback
+
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    # Its own session, so the agent can kill it together with anything it starts
+    os.setsid()
+    for fd in close_fds:
+        os.close(fd)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    for path, fd in ((request["stdout_path"], 1), (request["stderr_path"], 2)):
+        target = os.open(path, os.O_WRONLY)
+        os.dup2(target, fd)
+        os.close(target)
+
+    # Make the child look like `python file_path args` started in cwd
+    file_path = request["file_path"]
+    os.chdir(request["cwd"])
+    sys.argv = [file_path] + list(request["args"])
+    sys.path[0] = os.path.dirname(file_path)
+
+    code = 0
+    try:
+        runpy.run_path(file_path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Hide the runpy frames so the traceback matches a plain interpreter
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != file_path:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+
+def serve(preload: List[str]):
+    """Fork a child per request until stdin closes. Single-threaded so forking is safe."""
+    import importlib
+
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    # Wake up select() when a child exits
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    children = {}
+    buffer = b""
+
+    def send(message):
+        os.write(1, (json.dumps(message) + "\n").encode("utf-8"))
+
+    while True:
+        try:
+            ready, _, _ = select.select([0, wakeup_read], [], [])
+        except InterruptedError:
+            continue
+
+        if wakeup_read in ready:
+            try:
+                while os.read(wakeup_read, 512):
+                    pass
+            except BlockingIOError:
+                pass
+
+        # Reap every finished child
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            request_id = children.pop(pid, None)
+            if request_id is not None:
+                send({"id": request_id, "returncode": os.waitstatus_to_exitcode(status)})
+
+        if 0 in ready:
+            data = os.read(0, 65536)
+            if not data:
+                return
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                request = json.loads(line)
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(request, [wakeup_read, wakeup_write])
+                children[pid] = request["id"]
+                send({"id": request["id"], "pid": pid})
+
+
+# --- Agent side ---
+
+class _Output:
+    """Keeps everything a script writes; the default capture of run_script."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes):
+        self.data += data
+
+    def text(self) -> str:
+        return self.data.decode("utf-8", errors="replace")
+
+
+def _open_fifo(path: str) -> Tuple[int, int]:
+    """Create a FIFO and return (read fd, write fd).
+
+    The agent holds a write end until the child is done, so the reader
+    can't see end of file before the child has even opened the FIFO.
+    """
+    os.mkfifo(path, 0o600)
+    read_fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    write_fd = os.open(path, os.O_WRONLY)
+    os.set_blocking(read_fd, True)
+    return read_fd, write_fd
+
+
+def _drain(read_fd: int, capture):
+    with open(read_fd, "rb", buffering=0) as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            capture.write(chunk)
+
+
+def _kill_session(pid: Optional[int]):
+    if pid:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+class InterpreterPool:
+    """Client for a pre-warmed server interpreter that forks one child per script."""
+
+    def __init__(self, preload: List[str]):
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._next_id = 0
+        self._reader = threading.Thread(target=self._read_messages, name="interpreter-pool", daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def _read_messages(self):
+        for line in self._process.stdout:
+            message = json.loads(line)
+            with self._pending_lock:
+                state = self._pending.get(message["id"])
+            if state is None:
+                continue
+            if "pid" in message:
+                state["pid"] = message["pid"]
+                state["started"].set()
+            else:
+                state["returncode"] = message["returncode"]
+                state["finished"].set()
+        # The server is gone: fail every call still waiting on it
+        with self._pending_lock:
+            for state in self._pending.values():
+                state["started"].set()
+                state["finished"].set()
+
+    def run_script(self, file_path: str, args: List[str], cwd: str, timeout: float,
+                   capture: Optional[Callable[[], object]] = None) -> Tuple[str, str, int, bool]:
+        """Run a script in a fresh child of the server.
+
+        Returns (stdout, stderr, returncode, timed_out). A child that outlives
+        the timeout is killed, along with anything it started that still holds
+        its output open by then. capture makes the object each stream is
+        written into as it is produced (anything with write(bytes) and
+        text()); the default keeps all of it.
+        """
+        state = {"started": threading.Event(), "finished": threading.Event(), "pid": None, "returncode": None}
+        with self._pending_lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = state
+
+        captures, readers, write_fds = [], [], []
+        try:
+            with tempfile.TemporaryDirectory(prefix="run_python_file_") as temp_dir:
+                paths = [os.path.join(temp_dir, "stdout"), os.path.join(temp_dir, "stderr")]
+                for path in paths:
+                    read_fd, write_fd = _open_fifo(path)
+                    write_fds.append(write_fd)
+                    captures.append((capture or _Output)())
+                    readers.append(threading.Thread(target=_drain, args=(read_fd, captures[-1]), daemon=True))
+                    readers[-1].start()
+
+                request = {
+                    "id": request_id, "file_path": file_path, "args": list(args), "cwd": cwd,
+                    "stdout_path": paths[0], "stderr_path": paths[1],
+                }
+                with self._write_lock:
+                    self._process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+                    self._process.stdin.flush()
+
+                state["started"].wait()
+                deadline = time.monotonic() + timeout
+                timed_out = not state["finished"].wait(timeout)
+                if timed_out and state["pid"]:
+                    _kill_session(state["pid"])
+                    state["finished"].wait()
+                if state["returncode"] is None and not timed_out:
+                    raise RuntimeError("interpreter pool server exited unexpectedly")
+
+                # Output ends once everything the script started has closed it too;
+                # whatever still holds it at the deadline is killed
+                while write_fds:
+                    os.close(write_fds.pop())
+                for reader in readers:
+                    reader.join(max(0.0, deadline - time.monotonic()))
+                if any(reader.is_alive() for reader in readers):
+                    _kill_session(state["pid"])
+                    for reader in readers:
+                        reader.join()
+            stdout, stderr = (output.text() for output in captures)
+            return stdout, stderr, state["returncode"], timed_out
+        finally:
+            # Let the readers hit end of file if the child never ran
+            for fd in write_fds:
+                os.close(fd)
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+
+    def close(self):
+        if self._process.stdin:
+            self._process.stdin.close()
+        self._process.wait()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(preload: List[str]) -> InterpreterPool:
+    """Return the process-wide pool, (re)starting the server if needed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or not _pool.alive:
+            _pool = InterpreterPool(preload)
+        return _pool
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
@@ -1,10 +1,80 @@
 import os.path
+import re
+import signal
 import subprocess
+import sys
+import threading
+import time
 from typing import List, Optional
 
-from google.genai import types
-
 from config import Config
+from functions import interpreter_pool
+
+
+# Pipes are read a line at a time, but never more than this per read
+READ_CHUNK_SIZE = 65536
+
+_echo_lock = threading.Lock()
+
+
+class BoundedCapture:
+    """Keep the first and last bytes of a stream, counting what falls in between.
+
+    The head holds the first half of max_bytes and the tail is a ring buffer
+    of the second half, so memory stays bounded however much a script prints.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_limit:
+                del self.tail[:len(self.tail) - self.tail_limit]
+
+    def text(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if self.dropped:
+            head, tail = head.removesuffix("\n"), tail.removeprefix("\n")
+            return f"{head}\n[...{self.dropped} bytes of output dropped...]\n{tail}"
+        return head + tail
+
+
+def _kill_session(process: subprocess.Popen):
+    """Kill a script and anything it started in its session (just the script where there are no sessions)."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        process.kill()
+
+
+def _pump(pipe, capture: BoundedCapture, label: Optional[str]):
+    """Copy a pipe into a capture, echoing each line to the console when label is set."""
+    with pipe:
+        for line in iter(lambda: pipe.readline(READ_CHUNK_SIZE), b""):
+            capture.write(line)
+            if label:
+                with _echo_lock:
+                    sys.stdout.write(f"   [{label}] {line.decode('utf-8', errors='replace').rstrip()}\n")
+                    sys.stdout.flush()
 
 
 def format_output(stdout: str, stderr: str, returncode: int) -> str:
@@ -16,10 +86,7 @@ def format_output(stdout: str, stderr: str, returncode: int) -> str:
     if stderr:
         output_parts.append(f"STDERR:\n{stderr}")
     
-    if not output_parts:
-        return "No output produced."
-    
-    output = "\n\n".join(output_parts)
+    output = "\n\n".join(output_parts) if output_parts else "No output produced."
     
     if returncode != 0:
         output += f"\n\nProcess exited with code {returncode}"
@@ -27,7 +94,18 @@ def format_output(stdout: str, stderr: str, returncode: int) -> str:
     return output
 
 
-def run_python_file(working_directory: str, file_path: str, args: Optional[List[str]] = None) -> str:
+def parse_exit_code(output: str) -> Optional[int]:
+    """Recover a non-zero exit code from a run_python_file result.
+
+    Returns None when the result reports no exit code: the script exited with 0,
+    or never ran.
+    """
+    match = re.search(r"Process exited with code (-?\d+)$", output)
+    return int(match.group(1)) if match else None
+
+
+def run_python_file(working_directory: str, file_path: str, args: Optional[List[str]] = None,
+                    echo: Optional[bool] = None) -> str:
     """
     Execute a Python file and return formatted output.
     
@@ -35,12 +113,16 @@ def run_python_file(working_directory: str, file_path: str, args: Optional[List[
         working_directory: The working directory for the script
         file_path: Path to the Python file to execute (relative to working_directory)
         args: Command line arguments to pass to the script
+        echo: Print output lines to the console while the script runs (defaults to Config.ECHO_SCRIPT_OUTPUT)
         
     Returns:
-        Formatted string containing STDOUT/STDERR and process status
+        Formatted string containing STDOUT/STDERR and process status. Each stream
+        keeps at most Config.MAX_OUTPUT_BYTES (its head and tail).
     """
     if args is None:
         args = []
+    if echo is None:
+        echo = Config.ECHO_SCRIPT_OUTPUT
         
     abs_path_working_directory = os.path.abspath(working_directory)
     abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
@@ -58,35 +140,69 @@ def run_python_file(working_directory: str, file_path: str, args: Optional[List[
     if not abs_file_path.endswith(".py"):
         return f"Error: \"{file_path}\" is not a Python file."
 
+    # The pool doesn't echo output lines, so echoing needs a plain subprocess
+    if Config.PYTHON_WORKER_POOL and interpreter_pool.is_supported() and not echo:
+        try:
+            pool = interpreter_pool.get_pool(Config.PYTHON_POOL_PRELOAD)
+            stdout, stderr, returncode, timed_out = pool.run_script(
+                abs_file_path, args, abs_path_working_directory, Config.TIMEOUT,
+                capture=lambda: BoundedCapture(Config.MAX_OUTPUT_BYTES),
+            )
+        except Exception as e:
+            return f"Error: executing Python file: {str(e)}"
+        if timed_out:
+            return format_output(stdout, f"Process timed out after {Config.TIMEOUT} seconds\n{stderr}", -1)
+        return format_output(stdout, stderr, returncode)
+
     try:
-        # Run the Python file and capture the output
+        # Run the Python file; reader threads keep a bounded head and tail of each stream
         process = subprocess.Popen(
             ["python", abs_file_path] + args,
             cwd=abs_path_working_directory,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            start_new_session=True,
         )
-        
+        captures = {"stdout": BoundedCapture(Config.MAX_OUTPUT_BYTES), "stderr": BoundedCapture(Config.MAX_OUTPUT_BYTES)}
+        readers = [
+            threading.Thread(target=_pump, args=(pipe, captures[name], name if echo else None), daemon=True)
+            for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+
+        deadline = time.monotonic() + Config.TIMEOUT
         try:
-            stdout, stderr = process.communicate(timeout=Config.TIMEOUT)
-            return format_output(stdout, stderr, process.returncode)
-            
+            process.wait(timeout=Config.TIMEOUT)
+            timed_out = False
         except subprocess.TimeoutExpired:
-            process.kill()
-            stdout, stderr = process.communicate()
+            _kill_session(process)
+            process.wait()
+            timed_out = True
+        # The pipes close once everything the script started has exited too;
+        # whatever still holds them at the deadline is killed
+        for reader in readers:
+            reader.join(max(0.0, deadline - time.monotonic()))
+        if any(reader.is_alive() for reader in readers):
+            _kill_session(process)
+            for reader in readers:
+                reader.join()
+
+        stdout, stderr = captures["stdout"].text(), captures["stderr"].text()
+        if timed_out:
             return format_output(
                 stdout,
                 f"Process timed out after {Config.TIMEOUT} seconds\n{stderr}",
                 -1
             )
+        return format_output(stdout, stderr, process.returncode)
         
     except Exception as e:
         return f"Error: executing Python file: {str(e)}"
 
 def schema_run_python_file():
+    from google.genai import types
+
     return types.FunctionDeclaration(
 	    name="run_python_file",
 	    description="Executes a Python file within the working directory and returns the output from the interpreter.",
@@ -0,0 +1,308 @@
+import os
+import re
+import threading
+
+from config import Config
+
+# Directories that never contain files worth searching
+SKIPPED_DIRECTORIES = {"__pycache__", ".git", ".venv", "venv", "node_modules"}
+
+MAX_LINE_CHARS = 300
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Escapes that stand for a character given by the digits or name after them
+_CODE_ESCAPES = {"x": 2, "u": 4, "U": 8}
+
+
+def _required_literals(pattern):
+    """Return literal substrings every match of a regex must contain (lowercased).
+
+    This is conservative: anything it can't reason about (alternation, inline
+    flags, groups, classes, escapes naming a character, optional characters)
+    just contributes no literal.
+    """
+    literals, current = [], []
+    depth = 0
+    i = 0
+
+    def flush():
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if escaped and not escaped.isalnum():
+                if depth == 0:
+                    current.append(escaped)
+                continue
+            # \d, \b, \1, \x41, \N{...}, \101 and the like are not the character after the backslash
+            flush()
+            if escaped in _CODE_ESCAPES:
+                i += _CODE_ESCAPES[escaped]
+            elif escaped == "N":
+                end = pattern.find("}", i)
+                i = len(pattern) if end == -1 else end + 1
+            elif escaped.isdigit():
+                while i < len(pattern) and pattern[i].isdigit():
+                    i += 1
+            continue
+        if c == "|" and depth == 0:
+            return []
+        if c in "*?":
+            # The previous character may be absent
+            if current:
+                current.pop()
+            flush()
+        elif c == "{":
+            if current:
+                current.pop()
+            flush()
+            end = pattern.find("}", i)
+            i = len(pattern) if end == -1 else end
+        elif c == "[":
+            flush()
+            # A ] right after [ or [^ is a member, not the end of the class
+            end = i + 1
+            if pattern[end:end + 1] == "^":
+                end += 1
+            if pattern[end:end + 1] == "]":
+                end += 1
+            while end < len(pattern) and pattern[end] != "]":
+                end += 2 if pattern[end] == "\\" else 1
+            i = end
+        elif c == "(":
+            # Inline flags such as (?x) or (?i:...) change what the rest of the pattern means
+            if pattern[i + 1:i + 2] == "?" and pattern[i + 2:i + 3] in set("aiLmsux-"):
+                return []
+            flush()
+            depth += 1
+        elif c == ")":
+            depth = max(0, depth - 1)
+        elif c in "+.^$":
+            flush()
+        elif depth == 0:
+            current.append(c)
+        i += 1
+    flush()
+    return [literal.lower() for literal in literals if len(literal) >= 3]
+
+
+class SearchIndex:
+    """Trigram index over the text files of a working directory.
+
+    refresh() re-reads only files whose mtime or size changed since the last
+    refresh, so keeping the index current is cheap between searches.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._files = {}
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        """Yield (relative path, stat) for every indexable file."""
+        root_depth = self.root.rstrip(os.sep).count(os.sep)
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath.count(os.sep) - root_depth >= Config.MAX_DIRECTORY_DEPTH:
+                dirnames[:] = []
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRECTORIES and not d.startswith("."))
+            for filename in filenames:
+                if not filename.endswith(tuple(Config.ALLOWED_FILE_EXTENSIONS)):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_size <= Config.SEARCH_MAX_FILE_BYTES:
+                    yield os.path.relpath(path, self.root).replace(os.sep, "/"), stat
+
+    def refresh(self):
+        """Bring the index up to date with the files on disk. Returns the number of files re-indexed."""
+        with self._lock:
+            seen = set()
+            updated = 0
+            for rel_path, stat in self._scan():
+                seen.add(rel_path)
+                fingerprint = (stat.st_mtime_ns, stat.st_size)
+                entry = self._files.get(rel_path)
+                if entry and entry[0] == fingerprint:
+                    continue
+                try:
+                    with open(os.path.join(self.root, rel_path), encoding="utf-8", errors="replace") as f:
+                        text = f.read()
+                except OSError:
+                    continue
+                self._remove(rel_path)
+                trigrams = _trigrams(text.lower())
+                self._files[rel_path] = (fingerprint, text.splitlines(), trigrams)
+                for trigram in trigrams:
+                    self._postings.setdefault(trigram, set()).add(rel_path)
+                updated += 1
+            for rel_path in set(self._files) - seen:
+                self._remove(rel_path)
+            return updated
+
+    def _remove(self, rel_path):
+        entry = self._files.pop(rel_path, None)
+        if entry is None:
+            return
+        for trigram in entry[2]:
+            paths = self._postings.get(trigram)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self._postings[trigram]
+
+    def candidates(self, literals):
+        """Return the sorted paths that contain every trigram of the given literals."""
+        with self._lock:
+            paths = set(self._files)
+            for literal in literals:
+                for trigram in _trigrams(literal):
+                    paths &= self._postings.get(trigram, set())
+                    if not paths:
+                        return []
+            return sorted(paths)
+
+    def lines(self, rel_path):
+        with self._lock:
+            entry = self._files.get(rel_path)
+            return entry[1] if entry else []
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(working_directory):
+    """Return the search index for a working directory, creating it on first use."""
+    root = os.path.abspath(working_directory)
+    with _indexes_lock:
+        if root not in _indexes:
+            _indexes[root] = SearchIndex(root)
+        return _indexes[root]
+
+
+def _format_line(rel_path, number, line, separator):
+    if len(line) > MAX_LINE_CHARS:
+        line = line[:MAX_LINE_CHARS] + "..."
+    return f"{rel_path}{separator}{number}{separator} {line}"
+
+
+def search_files(working_directory, pattern, directory=".", regex=False, case_sensitive=True,
+                 context_lines=0, max_results=None):
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_target_dir = os.path.abspath(os.path.join(working_directory, directory))
+
+    if not abs_target_dir.startswith(abs_working_dir):
+        return f'Error: Cannot search "{directory}" as it is outside the permitted working directory'
+
+    if not os.path.isdir(abs_target_dir):
+        return f'Error: "{directory}" is not a directory'
+
+    if not pattern:
+        return 'Error: A search pattern is required'
+
+    try:
+        flags = 0 if case_sensitive else re.IGNORECASE
+        matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+    except re.error as e:
+        return f'Error: Invalid regular expression "{pattern}": {e}'
+
+    context_lines = max(0, min(int(context_lines or 0), 10))
+    max_results = max(1, min(int(max_results or Config.SEARCH_MAX_RESULTS), Config.SEARCH_MAX_RESULTS))
+
+    try:
+        index = get_index(working_directory)
+        index.refresh()
+        literals = _required_literals(pattern) if regex else [pattern.lower()]
+        prefix = os.path.relpath(abs_target_dir, abs_working_dir).replace(os.sep, "/")
+        prefix = "" if prefix == "." else prefix + "/"
+
+        output_lines = []
+        matches = 0
+        for rel_path in index.candidates([literal for literal in literals if len(literal) >= 3]):
+            if not rel_path.startswith(prefix):
+                continue
+            lines = index.lines(rel_path)
+            last_shown = -1
+            for number, line in enumerate(lines):
+                if not matcher.search(line):
+                    continue
+                matches += 1
+                if matches > max_results:
+                    continue
+                start = max(number - context_lines, last_shown + 1)
+                if context_lines and output_lines and (start > last_shown + 1 or last_shown == -1):
+                    output_lines.append("--")
+                for context_number in range(start, number):
+                    output_lines.append(_format_line(rel_path, context_number + 1, lines[context_number], "-"))
+                output_lines.append(_format_line(rel_path, number + 1, line, ":"))
+                last_shown = number
+                # Trailing context is emitted up front; later matches skip what is already shown
+                for context_number in range(number + 1, min(number + 1 + context_lines, len(lines))):
+                    if matcher.search(lines[context_number]):
+                        break
+                    output_lines.append(_format_line(rel_path, context_number + 1, lines[context_number], "-"))
+                    last_shown = context_number
+
+        if not matches:
+            return f'No matches found for "{pattern}"'
+        if matches > max_results:
+            output_lines.append(f"[...{matches - max_results} more matches not shown]")
+        return "\n".join(output_lines)
+
+    except Exception as e:
+        return f'Error: {e}'
+
+
+def schema_search_files():
+    from google.genai import types
+
+    return types.FunctionDeclaration(
+        name="search_files",
+        description=(
+            "Searches the contents of text files in the working directory for a literal string or regular expression "
+            "and returns matching lines as path:line: text, optionally with surrounding context lines."
+        ),
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "pattern": types.Schema(
+                    type=types.Type.STRING,
+                    description="The text to search for, or a Python regular expression if regex is true.",
+                ),
+                "directory": types.Schema(
+                    type=types.Type.STRING,
+                    description="Only search files under this directory, relative to the working directory. Defaults to the whole working directory.",
+                ),
+                "regex": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Treat pattern as a regular expression instead of a literal string.",
+                ),
+                "case_sensitive": types.Schema(
+                    type=types.Type.BOOLEAN,
+                    description="Whether matching is case sensitive. Defaults to true.",
+                ),
+                "context_lines": types.Schema(
+                    type=types.Type.INTEGER,
+                    description="Number of lines of context to show before and after each match (at most 10).",
+                ),
+                "max_results": types.Schema(
+                    type=types.Type.INTEGER,
+                    description=f"Maximum number of matching lines to return (at most {Config.SEARCH_MAX_RESULTS}).",
+                ),
+            },
+            required=["pattern"],
+        ),
+    )
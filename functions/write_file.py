@@ -1,8 +1,34 @@
 import os
 import os.path
+import tempfile
 from pathlib import Path
 
-from google.genai import types
+# Mode of files created by atomic_write (mkstemp's own 0o600 would hide new files from other users)
+NEW_FILE_MODE = 0o644
+
+
+def atomic_write(abs_file_path, content):
+    """Replace a file's content via a temp file and rename, so readers never see a partial write.
+
+    A symlink is written through: its target is replaced, not the link itself.
+    """
+    abs_file_path = os.path.realpath(abs_file_path)
+    directory = os.path.dirname(abs_file_path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(abs_file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(abs_file_path):
+            os.chmod(temp_path, os.stat(abs_file_path).st_mode & 0o7777)
+        else:
+            os.chmod(temp_path, NEW_FILE_MODE)
+        os.replace(temp_path, abs_file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
 
 def write_file(working_directory, file_path, content):
@@ -17,8 +43,7 @@ def write_file(working_directory, file_path, content):
         os.makedirs(os.path.dirname(abs_file_path), exist_ok=True)
         
         # Write content to file
-        with open(abs_file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        atomic_write(abs_file_path, content)
             
         return f"Successfully wrote to \"{file_path}\" ({len(content)} characters written)"
         
@@ -26,6 +51,8 @@ def write_file(working_directory, file_path, content):
         return f"Error: {str(e)}"
 
 def schema_write_file():
+    from google.genai import types
+
     return types.FunctionDeclaration(
 	    name="write_file",
 	    description="Writes content to a file within the working directory. Creates the file if it doesn't exist.",
@@ -0,0 +1,113 @@
+"""
+Token-budgeted compaction of the conversation history sent to the model.
+
+Every tool result stays in `messages` and is re-sent on each iteration, so
+prompt size grows with every turn. The HistoryManager keeps the history under
+a token budget by dropping reads that a later read of the same file
+superseded, and by shrinking old tool outputs to a short head/tail summary.
+The most recent turns are never touched.
+"""
+
+import json
+import os
+from typing import Optional
+
+from config import Config
+
+# Rough characters-per-token ratio used for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def _part_chars(part) -> int:
+    chars = len(part.text or "")
+    if part.function_call:
+        chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+    if part.function_response:
+        chars += len(part.function_response.name or "") + len(json.dumps(part.function_response.response or {}, default=str))
+    return chars
+
+
+def estimate_tokens(messages) -> int:
+    """Estimate the prompt tokens a list of Content turns will cost."""
+    chars = sum(_part_chars(part) for content in messages for part in (content.parts or []))
+    return chars // CHARS_PER_TOKEN
+
+
+def _with_response(part, response: dict):
+    """Return a copy of a function_response part carrying a new response payload."""
+    return part.model_copy(update={"function_response": part.function_response.model_copy(update={"response": response})})
+
+
+def _response_text(part) -> str:
+    response = part.function_response.response or {}
+    if set(response) == {"result"} and isinstance(response["result"], str):
+        return response["result"]
+    return json.dumps(response, default=str)
+
+
+class HistoryManager:
+    """Keeps the messages list of a session within a token budget."""
+
+    def __init__(self, token_budget: Optional[int] = None, keep_recent_turns: Optional[int] = None,
+                 summary_chars: Optional[int] = None):
+        self.token_budget = token_budget or Config.HISTORY_TOKEN_BUDGET
+        self.keep_recent_turns = Config.HISTORY_KEEP_RECENT_TURNS if keep_recent_turns is None else keep_recent_turns
+        self.summary_chars = summary_chars or Config.HISTORY_SUMMARY_CHARS
+
+    def compact(self, messages: list) -> int:
+        """Compact messages in place and return the estimated number of tokens saved."""
+        before = estimate_tokens(messages)
+        self._drop_superseded_reads(messages)
+        if estimate_tokens(messages) > self.token_budget:
+            self._elide_stale_outputs(messages)
+        return before - estimate_tokens(messages)
+
+    def _tool_exchanges(self, messages):
+        """Yield (message index, part index, function_call, response part) for each tool call."""
+        for index in range(len(messages) - 1):
+            calls = [part.function_call for part in messages[index].parts or [] if part.function_call]
+            if not calls:
+                continue
+            responses = [
+                (part_index, part)
+                for part_index, part in enumerate(messages[index + 1].parts or [])
+                if part.function_response
+            ]
+            for function_call, (part_index, part) in zip(calls, responses):
+                yield index + 1, part_index, function_call, part
+
+    def _drop_superseded_reads(self, messages):
+        latest = {}
+        for message_index, part_index, function_call, part in self._tool_exchanges(messages):
+            if function_call.name != "get_file_content":
+                continue
+            args = dict(function_call.args or {})
+            args["file_path"] = os.path.normpath(str(args.get("file_path", "")))
+            key = json.dumps(args, sort_keys=True, default=str)
+            if key in latest:
+                earlier_message, earlier_part = latest[key]
+                parts = messages[earlier_message].parts
+                parts[earlier_part] = _with_response(
+                    parts[earlier_part],
+                    {"result": f"[Superseded by a later read of {args['file_path']}]"},
+                )
+            latest[key] = (message_index, part_index)
+
+    def _elide_stale_outputs(self, messages):
+        stale_before = len(messages) - self.keep_recent_turns
+        total = estimate_tokens(messages)
+        half = self.summary_chars // 2
+        for message_index, part_index, function_call, part in list(self._tool_exchanges(messages)):
+            if total <= self.token_budget or message_index >= stale_before:
+                break
+            text = _response_text(part)
+            # Leave short outputs, and outputs that were already summarized, alone
+            if len(text) <= 2 * self.summary_chars:
+                continue
+            summary = (
+                f"{text[:half]}\n[... {len(text) - 2 * half} characters of stale "
+                f"{function_call.name} output elided ...]\n{text[-half:]}"
+            )
+            parts = messages[message_index].parts
+            parts[part_index] = _with_response(part, {"result": summary})
+            total -= (_part_chars(part) - _part_chars(parts[part_index])) // CHARS_PER_TOKEN
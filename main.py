@@ -1,85 +1,239 @@
+import argparse
+import functools
+import itertools
 import os
 import sys
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-
-from config import MODEL_NAME, SYSTEM_PROMPT, WORKING_DIR
+import time
+
+from clients import create_client
+from config import Config, MAX_ITERATIONS, MODEL_NAME, SYSTEM_PROMPT, WORKING_DIR, load_environment
+from executor import get_executor
+from history import HistoryManager, estimate_tokens
+from scheduler import get_scheduler
+from sessions import SessionLog, is_finished
+from tool_cache import CACHED_RUN_MARKER, WRITE_TOOLS, Prefetcher, ScriptRunCache, ToolResultCache
+from tracing import tracer, usage_attrs
+from functions import interpreter_pool
+from functions.edit_file import edit_file, schema_edit_file
 from functions.get_file_content import get_file_content, schema_get_file_content
 from functions.get_files_info import get_files_info, schema_get_files_info
-from functions.run_python_file import run_python_file, schema_run_python_file
+from functions.search_files import search_files, schema_search_files
+from functions.run_python_file import parse_exit_code, run_python_file, schema_run_python_file
 from functions.write_file import write_file, schema_write_file
 
+history_manager = HistoryManager()
+tool_cache = ToolResultCache()
+run_cache = ScriptRunCache()
 
-def main():
-	load_dotenv()
-	# Check command line arguments
-	if len(sys.argv) < 2:
-		print("Error: A prompt argument is required.")
-		sys.exit(1)
+# Request config shared by every model call, see get_request_config()
+_request_config = None
+
+
+def parse_args(argv):
+	parser = argparse.ArgumentParser(description="AI coding agent powered by Gemini.")
+	parser.add_argument("prompt", nargs="*", help="The prompt to send to the agent")
+	parser.add_argument("--verbose", action="store_true", help="Print messages, tool calls and token usage")
+	parser.add_argument("--stream", action="store_true", help="Print model output as it is generated")
+	parser.add_argument(
+		"--context-cache", action="store_true", default=Config.USE_CONTEXT_CACHE,
+		help="Send the system prompt and tools as server-side cached content",
+	)
+	parser.add_argument(
+		"--python-pool", action="store_true", default=Config.PYTHON_WORKER_POOL,
+		help="Run scripts in children of a pre-warmed interpreter instead of a fresh python",
+	)
+	parser.add_argument(
+		"--echo-output", action="store_true", default=Config.ECHO_SCRIPT_OUTPUT,
+		help="Print the output of scripts the agent runs while they run",
+	)
+	parser.add_argument(
+		"--cache-runs", action="store_true", default=Config.CACHE_PYTHON_RUNS,
+		help="Reuse script results while the workspace's Python sources are unchanged",
+	)
+	parser.add_argument(
+		"--prefetch", action="store_true", default=Config.PREFETCH_FILES,
+		help="After a directory listing, read the small files it names into the tool cache in the background",
+	)
+	parser.add_argument(
+		"--rpm", type=int, default=Config.MODEL_REQUESTS_PER_MINUTE, metavar="N",
+		help="Keep model calls under N requests per minute (0 = no limit)",
+	)
+	parser.add_argument(
+		"--tpm", type=int, default=Config.MODEL_TOKENS_PER_MINUTE, metavar="N",
+		help="Keep model calls under N estimated tokens per minute (0 = no limit)",
+	)
+	parser.add_argument("--resume", metavar="SESSION_ID", help="Reload a saved session and continue it")
+	parser.add_argument("--trace", metavar="PATH", help="Write timing spans to a JSONL trace file and print a summary")
+	parser.add_argument("--record", metavar="PATH", help="Record model calls to a JSONL transcript")
+	parser.add_argument("--replay", metavar="PATH", help="Answer model calls from a recorded transcript")
+	parser.add_argument(
+		"--replay-latency", type=float, default=0.0, metavar="SECONDS",
+		help="Artificial latency added to each replayed model call",
+	)
+	return parser.parse_intermixed_args(argv)
 
-	# Check for --verbose flag
-	verbose = False
-	args = sys.argv[1:]
-	if "--verbose" in args:
-		verbose = True
-		args.remove("--verbose")  # Remove the flag from args
 
-	if not args:  # No prompt after removing --verbose
+def main():
+	# Parse first so --help and usage errors return before .env or the SDK are loaded
+	args = parse_args(sys.argv[1:])
+	load_environment()
+	verbose = args.verbose
+
+	if not args.prompt and not args.resume:
 		print("Error: A prompt argument is required.")
 		sys.exit(1)
 
-	prompt = " ".join(args)  # Join remaining arguments
+	prompt = " ".join(args.prompt)  # Join remaining arguments
 
-	if verbose:
+	if verbose and prompt:
 		print(f"User prompt: {prompt}")
 
-	messages = [
-		types.Content(
-			role="user",
-			parts=[types.Part(text=prompt)]
-		),
-	]
+	try:
+		messages, session = start_session(prompt, args.resume, verbose)
+	except ValueError as e:
+		print(f"Error: {e}")
+		sys.exit(1)
+
 	api_key = os.environ.get("GEMINI_API_KEY")
 
-	if not api_key:
+	if not api_key and not args.replay:
 		print("Error: GEMINI_API_KEY environment variable not set.")
 		sys.exit(1)
 
-	client = genai.Client(api_key=api_key)
-
-	# Maximum number of iterations to prevent infinite loops
-	max_iterations = 20
-	iteration = 0
+	client = create_client(api_key, record=args.record, replay=args.replay, latency=args.replay_latency)
+	context_cache = enable_context_cache(client, verbose) if args.context_cache else None
+	if args.trace:
+		tracer.enable()
+	Config.ECHO_SCRIPT_OUTPUT = args.echo_output
+	Config.CACHE_PYTHON_RUNS = args.cache_runs
+	Config.PREFETCH_FILES = args.prefetch
+	Config.MODEL_REQUESTS_PER_MINUTE = args.rpm
+	Config.MODEL_TOKENS_PER_MINUTE = args.tpm
+	if args.python_pool and interpreter_pool.is_supported():
+		# Start the server now so it warms up while the first model call runs
+		Config.PYTHON_WORKER_POOL = True
+		interpreter_pool.get_pool(Config.PYTHON_POOL_PRELOAD)
 
 	try:
-		while iteration < max_iterations:
-			if verbose:
-				print(f"\n--- Iteration {iteration + 1}/{max_iterations} ---")
+		response = run_agent(client, messages, verbose, stream=args.stream, session=session)
 
-			# Get the response from the model
-			response = generate_content(client, messages, verbose)
-
-			# Check if we have a final text response
-			if response:
-				print("Final response:")
-				print(response)
-				break
-
-			iteration += 1
-		else:
+		# Check if we have a final text response
+		if response is None:
 			print("\nReached maximum number of iterations. Stopping.")
+			print_resume_hint(session)
 			sys.exit(1)
 
+		# In streaming mode the response has already been printed
+		if not args.stream:
+			print("Final response:")
+			print(response)
+
+		if verbose:
+			print(f"\nTool cache: {tool_cache.stats()}")
+			if Config.CACHE_PYTHON_RUNS:
+				print(f"Run cache: {run_cache.stats()}")
+
 	except KeyboardInterrupt:
 		print("\nOperation cancelled by user.")
+		print_resume_hint(session)
 		sys.exit(0)
 	except Exception as e:
 		print(f"\nAn error occurred: {str(e)}")
 		if verbose:
 			import traceback
 			traceback.print_exc()
+		print_resume_hint(session)
 		sys.exit(1)
+	finally:
+		if context_cache is not None:
+			client.caches.delete(name=context_cache.name)
+		if args.trace:
+			tracer.export(args.trace)
+			print(f"\nTrace written to {args.trace}")
+			print(tracer.summary())
+
+
+def start_session(prompt, resume=None, verbose=False):
+	"""Return (messages, session log) for a new session or a resumed one.
+
+	Raises ValueError if the session to resume can't be continued.
+	"""
+	from google.genai import types
+
+	messages = []
+	session = None
+	if resume:
+		session = SessionLog(resume)
+		if not session.exists():
+			raise ValueError(f"No saved session \"{resume}\" in {Config.SESSIONS_DIR}.")
+		messages = session.load()
+		if not prompt and is_finished(messages):
+			raise ValueError(f"Session \"{resume}\" already has a final response; pass a prompt to continue it.")
+		if verbose:
+			print(f"Resumed session {session.session_id} with {len(messages)} messages")
+	elif Config.PERSIST_SESSIONS:
+		session = SessionLog()
+		if verbose:
+			print(f"Session: {session.session_id}")
+
+	if prompt:
+		messages.append(
+			types.Content(
+				role="user",
+				parts=[types.Part(text=prompt)]
+			)
+		)
+	return messages, session
+
+
+def print_resume_hint(session):
+	if session is not None:
+		print(f"Session saved; continue it with: python main.py --resume {session.session_id}")
+
+
+def run_agent(client, messages, verbose=False, max_iterations=MAX_ITERATIONS, stream=False, session=None):
+	"""Run the agent loop until the model answers with text.
+
+	With stream=True, model output is printed as it arrives. With a session,
+	every completed turn is appended to its on-disk log. Returns the final
+	response, or None if max_iterations was reached.
+	"""
+	generate = generate_content_stream if stream else generate_content
+	with tracer.span("session", "run_agent") as span:
+		for iteration in range(max_iterations):
+			span["iterations"] = iteration + 1
+			if verbose:
+				print(f"\n--- Iteration {iteration + 1}/{max_iterations} ---")
+
+			# Keep the re-sent history within its token budget
+			compact_history(messages, verbose)
+
+			# Get the response from the model
+			try:
+				response = generate(client, messages, verbose)
+			finally:
+				if session is not None:
+					session.sync(messages)
+			if response:
+				return response
+	return None
+
+
+async def run_agent_async(client, messages, verbose=False, max_iterations=MAX_ITERATIONS):
+	"""Async version of run_agent using the client's aio interface."""
+	with tracer.span("session", "run_agent_async") as span:
+		for iteration in range(max_iterations):
+			span["iterations"] = iteration + 1
+			if verbose:
+				print(f"\n--- Iteration {iteration + 1}/{max_iterations} ---")
+
+			# Keep the re-sent history within its token budget
+			compact_history(messages, verbose)
+
+			response = await generate_content_async(client, messages, verbose)
+			if response:
+				return response
+	return None
 
 
 def generate_content(client, messages, verbose=False):
@@ -87,73 +241,283 @@ def generate_content(client, messages, verbose=False):
 		print("\n--- Sending to model ---")
 		print(f"Messages: {messages}")
 
-	try:
-		response = client.models.generate_content(
-			model="gemini-2.0-flash-001",
-			contents=messages,
-			config=types.GenerateContentConfig(
-				tools=[get_available_functions()],
-				system_instruction=SYSTEM_PROMPT
-			),
-		)
+	def request():
+		with tracer.span("model", MODEL_NAME) as span:
+			response = client.models.generate_content(
+				model=MODEL_NAME,
+				contents=messages,
+				config=get_request_config(),
+			)
+			span.update(usage_attrs(response.usage_metadata))
+		return response
 
+	try:
+		response = get_scheduler().call(request, estimate_tokens(messages))
+		return process_response(response, messages, verbose)
+	except Exception as e:
+		print(f"\nError in generate_content: {str(e)}")
 		if verbose:
-			print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
-			print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
+			import traceback
+			traceback.print_exc()
+		# Re-raise the exception to be handled by the main loop
+		raise
 
-		# Process the model's response
-		if response.candidates:
-			for candidate in response.candidates:
-				# Add the model's response to messages
-				messages.append(candidate.content)
 
-		# Check if there are function calls to process
-		if not response.function_calls:
-			return response.text
+async def generate_content_async(client, messages, verbose=False):
+	if verbose:
+		print("\n--- Sending to model ---")
+		print(f"Messages: {messages}")
 
-		# Process function calls if any
-		function_responses = []
-		for function_call_part in response.function_calls:
-			function_call_result = call_function(function_call_part, verbose=verbose)
+	async def request():
+		with tracer.span("model", MODEL_NAME) as span:
+			response = await client.aio.models.generate_content(
+				model=MODEL_NAME,
+				contents=messages,
+				config=get_request_config(),
+			)
+			span.update(usage_attrs(response.usage_metadata))
+		return response
 
-			if (not function_call_result.parts or not function_call_result.parts[0].function_response):
-				raise Exception("empty function call result")
+	try:
+		response = await get_scheduler().acall(request, estimate_tokens(messages))
+		import asyncio
 
-			if verbose:
-				print(f"-> {function_call_result.parts[0].function_response.response}")
+		# Tool calls block, so keep them off the event loop
+		return await asyncio.to_thread(process_response, response, messages, verbose)
+	except Exception as e:
+		print(f"\nError in generate_content: {str(e)}")
+		if verbose:
+			import traceback
+			traceback.print_exc()
+		raise
 
-			function_responses.append(function_call_result.parts[0])
 
-		if not function_responses:
-			raise Exception("no function responses generated, exiting.")
+def generate_content_stream(client, messages, verbose=False):
+	"""Streaming version of generate_content.
+
+	Text is printed as it arrives and each function call is dispatched as soon
+	as the chunk carrying it is received, so tools run while the model is
+	still generating. Returns the streamed text if the model is done,
+	otherwise None.
+	"""
+	from google.genai import types
+
+	if verbose:
+		print("\n--- Sending to model (streaming) ---")
+		print(f"Messages: {messages}")
 
-		# Convert function responses to a user message and add to messages
-		function_message = types.Content(
-			role="user",
-			parts=function_responses
+	try:
+		batch = get_executor().batch(
+			lambda function_call_part: call_function(function_call_part, verbose=verbose)
 		)
-		messages.append(function_message)
+		parts = []
+		text = []
+		usage_metadata = None
+
+		def open_stream():
+			"""Start the stream and wait for its first chunk, so failures before any output can be retried."""
+			start = time.perf_counter()
+			chunks = client.models.generate_content_stream(
+				model=MODEL_NAME,
+				contents=messages,
+				config=get_request_config(),
+			)
+			first = next(chunks, None)
+			span["first_chunk_ms"] = round((time.perf_counter() - start) * 1000, 3)
+			return itertools.chain([first] if first else [], chunks)
+
+		scheduler = get_scheduler()
+		estimated_tokens = estimate_tokens(messages)
+		with tracer.span("model", MODEL_NAME, stream=True) as span:
+			for chunk in scheduler.call(open_stream, estimated_tokens):
+				usage_metadata = chunk.usage_metadata or usage_metadata
+				if not chunk.candidates or not chunk.candidates[0].content:
+					continue
+				for part in chunk.candidates[0].content.parts or []:
+					parts.append(part)
+					if part.function_call:
+						batch.submit(part.function_call)
+					elif part.text:
+						print(part.text, end="", flush=True)
+						text.append(part.text)
+			span.update(usage_attrs(usage_metadata))
+		scheduler.record_usage(usage_metadata, estimated_tokens)
+		if text:
+			print()
+
+		if verbose and usage_metadata:
+			print(f"Prompt tokens: {usage_metadata.prompt_token_count}")
+			print(f"Response tokens: {usage_metadata.candidates_token_count}")
+
+		# Add the model's response to messages
+		messages.append(types.Content(role="model", parts=parts))
+
+		# Tools started during generation; wait for the ones still running
+		with tracer.span("tools", "turn"):
+			function_call_results = batch.results()
+		if not function_call_results:
+			return "".join(text)
+
+		append_function_responses(function_call_results, messages, verbose)
+		return None
 	except Exception as e:
 		print(f"\nError in generate_content: {str(e)}")
 		if verbose:
 			import traceback
 			traceback.print_exc()
-		# Re-raise the exception to be handled by the main loop
 		raise
 
 
-# Create the available functions tool
+def process_response(response, messages, verbose=False):
+	"""Record a model response in messages and run any function calls it makes.
+
+	Returns the response text if the model is done, otherwise None.
+	"""
+	if verbose:
+		print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
+		print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
+
+	# Process the model's response
+	if response.candidates:
+		for candidate in response.candidates:
+			# Add the model's response to messages
+			messages.append(candidate.content)
+
+	# Check if there are function calls to process
+	if not response.function_calls:
+		return response.text
+
+	# Process function calls, running independent ones concurrently
+	with tracer.span("tools", "turn", calls=len(response.function_calls)):
+		function_call_results = get_executor().run(
+			response.function_calls,
+			lambda function_call_part: call_function(function_call_part, verbose=verbose),
+		)
+	append_function_responses(function_call_results, messages, verbose)
+	return None
+
+
+def append_function_responses(function_call_results, messages, verbose=False):
+	"""Add the results of a turn's function calls to messages as one user message."""
+	from google.genai import types
+
+	function_responses = []
+	for function_call_result in function_call_results:
+		if (not function_call_result.parts or not function_call_result.parts[0].function_response):
+			raise Exception("empty function call result")
+
+		if verbose:
+			print(f"-> {function_call_result.parts[0].function_response.response}")
+
+		function_responses.append(function_call_result.parts[0])
+
+	if not function_responses:
+		raise Exception("no function responses generated, exiting.")
+
+	# Convert function responses to a user message and add to messages
+	function_message = types.Content(
+		role="user",
+		parts=function_responses
+	)
+	messages.append(function_message)
+
+
+def compact_history(messages, verbose=False):
+	saved = history_manager.compact(messages)
+	if verbose and saved:
+		print(f"History compacted: ~{saved} tokens saved")
+
+
+# Create the available functions tool once per process
+@functools.cache
 def get_available_functions():
+	from google.genai import types
+
 	return types.Tool(
 		function_declarations=[
 			schema_get_files_info(),
 			schema_get_file_content(),
+			schema_search_files(),
 			schema_run_python_file(),
 			schema_write_file(),
+			schema_edit_file(),
 		]
 	)
 
+def get_request_config():
+	"""Return the GenerateContentConfig sent with every model call, building it once."""
+	global _request_config
+	from google.genai import types
+
+	if _request_config is None:
+		_request_config = types.GenerateContentConfig(
+			tools=[get_available_functions()],
+			system_instruction=SYSTEM_PROMPT
+		)
+	return _request_config
+
+
+def enable_context_cache(client, verbose=False):
+	"""Register the system prompt and tools as cached content on the server.
+
+	Later model calls reference the cache instead of re-sending them. Returns
+	the cache, or None if the server refused it (e.g. the prompt is below the
+	model's minimum cacheable size), in which case the inline config is kept.
+	"""
+	global _request_config
+	from google.genai import types
+
+	try:
+		cache = client.caches.create(
+			model=MODEL_NAME,
+			config=types.CreateCachedContentConfig(
+				display_name=f"{Config.PROJECT_NAME}-system",
+				system_instruction=SYSTEM_PROMPT,
+				tools=[get_available_functions()],
+				ttl=f"{Config.CONTEXT_CACHE_TTL}s",
+			),
+		)
+	except Exception as e:
+		print(f"Warning: context caching unavailable, sending the full request config: {e}")
+		return None
+
+	if verbose:
+		print(f"Using cached context: {cache.name}")
+	_request_config = types.GenerateContentConfig(cached_content=cache.name)
+	return cache
+
+
+def refresh_context_cache(client, cache, verbose=False):
+	"""Extend a context cache by another CONTEXT_CACHE_TTL seconds.
+
+	Long-lived processes call this before the cache expires. If it can't be
+	extended (e.g. it already expired), a new cache is created, and failing
+	that the inline config is used again. Returns the cache now in use or None.
+	"""
+	global _request_config
+	from google.genai import types
+
+	try:
+		client.caches.update(
+			name=cache.name,
+			config=types.UpdateCachedContentConfig(ttl=f"{Config.CONTEXT_CACHE_TTL}s"),
+		)
+		return cache
+	except Exception as e:
+		if verbose:
+			print(f"Could not extend cached context {cache.name}, creating a new one: {e}")
+	_request_config = None
+	return enable_context_cache(client, verbose)
+
+
+@functools.cache
+def get_prefetcher():
+	return Prefetcher(tool_cache, get_file_content)
+
+
 def call_function(function_call_part, verbose=False):
+	from google.genai import types
+
 	function_name = function_call_part.name
 	function_args = dict(function_call_part.args) or {}
 
@@ -161,7 +525,9 @@ def call_function(function_call_part, verbose=False):
 	available_functions = {
 		"get_files_info": get_files_info,
 		"get_file_content": get_file_content,
+		"search_files": search_files,
 		"write_file": write_file,
+		"edit_file": edit_file,
 		"run_python_file": run_python_file
 	}
 
@@ -188,7 +554,24 @@ def call_function(function_call_part, verbose=False):
 	try:
 		# Call the function with the provided arguments
 		function = available_functions[function_name]
-		result = function(**function_args)
+		with tracer.span("tool", function_name) as span:
+			if tool_cache.is_cacheable(function_name):
+				result = tool_cache.get_or_call(function_name, function_args, lambda: function(**function_args))
+				if function_name == "get_files_info" and Config.PREFETCH_FILES:
+					# The model usually reads some of these next; load them while it thinks
+					get_prefetcher().after_listing(function_args, result)
+			elif function_name == "run_python_file" and Config.CACHE_PYTHON_RUNS:
+				result = run_cache.get_or_call(function_args, lambda: function(**function_args))
+				if not result.startswith(CACHED_RUN_MARKER):
+					tool_cache.invalidate_after(function_name, function_args)
+			else:
+				result = function(**function_args)
+				tool_cache.invalidate_after(function_name, function_args)
+				if function_name in WRITE_TOOLS:
+					run_cache.clear()
+			span["bytes"] = len(str(result).encode("utf-8"))
+			if function_name == "run_python_file":
+				span["exit_code"] = parse_exit_code(result)
 
 		# Convert the result to the appropriate format
 		return types.Content(
@@ -0,0 +1,206 @@
+"""
+Rate-limit-aware scheduling of model calls.
+
+Every model call in the process goes through one RequestScheduler, which
+
+- waits on token buckets for requests per minute and tokens per minute, so
+  concurrent sessions together stay under the quota instead of tripping it;
+- retries transient failures (429, 5xx, dropped connections) with jittered
+  exponential backoff, honoring the server's RetryInfo or Retry-After hint
+  when there is one;
+- after a 429, holds back every other caller until the hinted time too, since
+  they share the quota that was just exhausted.
+
+Limits of 0 disable the corresponding bucket.
+"""
+
+import random
+import re
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from config import Config
+from tracing import tracer
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute.
+
+    Reservations may overdraw the bucket; the caller then waits until the
+    debt is repaid, which serves waiters in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount tokens and return how many seconds to wait before using them."""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float):
+        """Correct an earlier reservation once the real cost is known (negative gives tokens back)."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+def _parse_seconds(value) -> Optional[float]:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)s?\s*", str(value))
+    return float(match.group(1)) if match else None
+
+
+def retry_hint(error) -> Optional[float]:
+    """Return the delay in seconds the server asked for, from RetryInfo or Retry-After."""
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in (details.get("error") or details).get("details") or []:
+            if isinstance(detail, dict) and "RetryInfo" in str(detail.get("@type", "")):
+                delay = _parse_seconds(detail.get("retryDelay", ""))
+                if delay is not None:
+                    return delay
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        return _parse_seconds(headers.get("retry-after", ""))
+    return None
+
+
+def status_code(error) -> Optional[int]:
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error) -> bool:
+    if status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    # httpx is only loaded once the SDK is, so it is looked up rather than imported
+    httpx = sys.modules.get("httpx")
+    return isinstance(error, (ConnectionError, TimeoutError)) or (
+        httpx is not None and isinstance(error, httpx.TransportError)
+    )
+
+
+class RequestScheduler:
+    """Throttles and retries model calls for every session in the process."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        rpm = Config.MODEL_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tpm = Config.MODEL_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.requests = TokenBucket(rpm, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock) if tpm else None
+        self.max_retries = Config.MODEL_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = Config.MODEL_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.MODEL_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def _admission_delay(self, estimated_tokens: int) -> float:
+        """Reserve capacity for one request and return how long to wait before sending it."""
+        with self._lock:
+            delay = max(0.0, self._paused_until - self._clock())
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens and estimated_tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+    def _retry_delay(self, error, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying after error, or None to give up."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hint = retry_hint(error)
+        delay = backoff if hint is None else hint + random.uniform(0, self.base_delay)
+        if status_code(error) == 429:
+            # The quota is shared, so hold back every other caller as well
+            with self._lock:
+                self._paused_until = max(self._paused_until, self._clock() + delay)
+        self.retries += 1
+        return delay
+
+    def record_usage(self, usage_metadata, estimated_tokens: int):
+        """Charge the token bucket for the difference between the estimate and real usage."""
+        total = getattr(usage_metadata, "total_token_count", None)
+        if self.tokens and total:
+            self.tokens.adjust(total - estimated_tokens)
+
+    def _wait(self, kind: str, delay: float, **attrs):
+        start = time.perf_counter()
+        self._sleep(delay)
+        tracer.record(kind, "model", start, time.perf_counter(), **attrs)
+
+    def call(self, request: Callable, estimated_tokens: int = 0):
+        """Run request() once capacity allows, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            delay = self._admission_delay(estimated_tokens)
+            if delay:
+                self._wait("throttle", delay)
+            try:
+                response = request()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                self._wait("retry", delay, status=status_code(e) or type(e).__name__, attempt=attempt + 1)
+                continue
+            self.record_usage(getattr(response, "usage_metadata", None), estimated_tokens)
+            return response
+
+    async def acall(self, request: Callable, estimated_tokens: int = 0):
+        """Async version of call; request() must return an awaitable."""
+        import asyncio
+
+        for attempt in range(self.max_retries + 1):
+            delay = self._admission_delay(estimated_tokens)
+            if delay:
+                start = time.perf_counter()
+                await asyncio.sleep(delay)
+                tracer.record("throttle", "model", start, time.perf_counter())
+            try:
+                response = await request()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                start = time.perf_counter()
+                await asyncio.sleep(delay)
+                tracer.record("retry", "model", start, time.perf_counter(),
+                              status=status_code(e) or type(e).__name__, attempt=attempt + 1)
+                continue
+            self.record_usage(getattr(response, "usage_metadata", None), estimated_tokens)
+            return response
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Return the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
@@ -0,0 +1,133 @@
+"""
+Persistent, resumable agent sessions.
+
+Every message of a session is appended to `<SESSIONS_DIR>/<id>.jsonl` as
+soon as its turn completes, so a crash, a timeout or running out of
+iterations loses nothing. Large tool payloads and text parts are stored
+once under `<SESSIONS_DIR>/blobs/<sha256>` and referenced from the log,
+which keeps the log compact when the same file is read over and over.
+Loading a session rebuilds the `types.Content` list so the loop can carry
+on where it stopped.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from google.genai import types
+
+from config import Config
+
+BLOB_KEY = "$blob"
+
+
+def new_session_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+class SessionLog:
+    """Append-only on-disk log of one session's messages."""
+
+    def __init__(self, session_id: Optional[str] = None, directory: Optional[str] = None):
+        self.session_id = session_id or new_session_id()
+        self.directory = directory or Config.SESSIONS_DIR
+        self.path = os.path.join(self.directory, f"{self.session_id}.jsonl")
+        self.blob_dir = os.path.join(self.directory, "blobs")
+        self._written = 0
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    # --- Writing ---
+
+    def _store_blob(self, value) -> dict:
+        data = json.dumps(value, sort_keys=True).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.blob_dir, digest)
+        if not os.path.exists(path):
+            os.makedirs(self.blob_dir, exist_ok=True)
+            # A unique temp file per writer, so threads and processes storing the same blob don't collide
+            fd, temp_path = tempfile.mkstemp(dir=self.blob_dir, prefix=f"{digest}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return {BLOB_KEY: digest}
+
+    def _pack(self, content: "types.Content") -> dict:
+        """Dump a message, moving large text and tool payloads out to blobs."""
+        message = content.model_dump(mode="json", exclude_none=True)
+        for part in message.get("parts", []):
+            if len(part.get("text", "")) > Config.SESSION_BLOB_THRESHOLD:
+                part["text"] = self._store_blob(part["text"])
+            response = part.get("function_response")
+            if response and len(json.dumps(response.get("response"))) > Config.SESSION_BLOB_THRESHOLD:
+                response["response"] = self._store_blob(response["response"])
+        return message
+
+    def sync(self, messages: List["types.Content"]):
+        """Append the messages not yet written. Messages are only ever appended to the list."""
+        if self._written >= len(messages):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        lines = [json.dumps(self._pack(content)) + "\n" for content in messages[self._written:]]
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+        self._written = len(messages)
+
+    # --- Reading ---
+
+    def _load_blob(self, value):
+        if isinstance(value, dict) and set(value) == {BLOB_KEY}:
+            with open(os.path.join(self.blob_dir, value[BLOB_KEY]), encoding="utf-8") as f:
+                return json.load(f)
+        return value
+
+    def load(self) -> List["types.Content"]:
+        """Rebuild the session's messages, ready to be sent to the model again."""
+        from google.genai import types
+
+        messages = []
+        offsets = []
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partial last line behind
+                    break
+                for part in message.get("parts", []):
+                    if "text" in part:
+                        part["text"] = self._load_blob(part["text"])
+                    if "function_response" in part:
+                        part["function_response"]["response"] = self._load_blob(part["function_response"]["response"])
+                messages.append(types.Content.model_validate(message))
+                offsets.append(offset)
+                offset += len(line)
+
+        # A turn interrupted while its tools ran has calls without responses; the model will redo it
+        if messages and any(part.function_call for part in messages[-1].parts or []):
+            messages.pop()
+            offset = offsets.pop()
+        # Drop anything after the last usable message so new turns follow it directly
+        with open(self.path, "r+b") as f:
+            f.truncate(offset)
+        self._written = len(messages)
+        return messages
+
+
+def is_finished(messages: List["types.Content"]) -> bool:
+    """Whether the last message is a final text answer from the model."""
+    if not messages or messages[-1].role != "model":
+        return False
+    return not any(part.function_call for part in messages[-1].parts or [])
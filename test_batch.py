@@ -0,0 +1,72 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from google.genai import types
+
+from batch import read_prompts, run_batch
+from clients import ReplayClient, request_key
+
+
+def answer(prompt, text):
+    """Return a replay entry answering the first model call of a session for prompt."""
+    contents = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    response = types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=0, candidates_token_count=0),
+    )
+    return {"request": request_key(contents), "response": response.model_dump(mode="json", exclude_none=True)}
+
+
+def test_batch():
+    lines = [
+        json.dumps({"id": "add", "prompt": "What is 2 + 2?"}),
+        "",
+        json.dumps("Say hello"),
+        "{not json",
+        json.dumps({"id": "empty"}),
+        json.dumps({"prompt": "Nobody recorded this"}),
+    ]
+
+    # Test 1: Objects and bare strings become items; bad lines become error items
+    items = list(read_prompts(io.StringIO("\n".join(lines) + "\n")))
+    print(items)
+    assert [item["id"] for item in items] == ["add", 3, 4, 5, 6]
+    assert items[1] == {"prompt": "Say hello", "id": 3}
+    assert items[2]["error"].startswith("invalid JSON") and items[3]["error"] == "missing prompt"
+
+    # Test 2: Every item gets one result record, with the failures counted
+    client = ReplayClient([answer("Say hello", "Hello!"), answer("What is 2 + 2?", "4")])
+    output = io.StringIO()
+    failures = asyncio.run(run_batch(client, items, output, concurrency=2))
+    results = {result["id"]: result for result in map(json.loads, output.getvalue().splitlines())}
+    print(results)
+    assert len(results) == 5 and failures == 3
+    assert results["add"] == {"id": "add", "prompt": "What is 2 + 2?", "response": "4"}
+    assert results[3]["response"] == "Hello!"
+    assert results[4]["prompt"] is None and "invalid JSON" in results[4]["error"]
+    assert results[5]["error"] == "missing prompt"
+    assert "error" in results[6] and "response" not in results[6]
+
+    # Test 3: The CLI answers from a recorded transcript through --replay
+    with tempfile.TemporaryDirectory() as temp_dir:
+        transcript = os.path.join(temp_dir, "transcript.jsonl")
+        with open(transcript, "w", encoding="utf-8") as f:
+            f.write(json.dumps(answer("Say hello", "Hello!")) + "\n")
+        env = {key: value for key, value in os.environ.items() if key != "GEMINI_API_KEY"}
+        result = subprocess.run(
+            [sys.executable, "batch.py", "-", "--replay", transcript],
+            input=json.dumps("Say hello") + "\n", env=env, capture_output=True, text=True, timeout=60,
+        )
+        print(result.stdout, result.stderr[-300:])
+        assert result.returncode == 0
+        assert json.loads(result.stdout) == {"id": 1, "prompt": "Say hello", "response": "Hello!"}
+    print("Batch tests passed")
+
+
+if __name__ == "__main__":
+    test_batch()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+from google.genai import types
+
+from clients import RecordingClient, ReplayClient
+
+
+def _response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+def _contents(prompt):
+    return [types.Content(role="user", parts=[types.Part(text=prompt)])]
+
+
+def test_clients():
+    # A stand-in for genai.Client that answers by echoing the prompt
+    def generate_content(model, contents, config=None):
+        return _response(f"echo: {contents[-1].parts[0].text}")
+
+    def generate_content_stream(model, contents, config=None):
+        yield _response("streamed ")
+        yield _response("answer")
+
+    live = SimpleNamespace(
+        models=SimpleNamespace(generate_content=generate_content, generate_content_stream=generate_content_stream),
+        aio=SimpleNamespace(aclose=None),
+        caches=None,
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "transcript.jsonl")
+
+        # Test 1: Record two calls and a stream
+        recorder = RecordingClient(live, path)
+        recorder.models.generate_content(model="m", contents=_contents("first"))
+        recorder.models.generate_content(model="m", contents=_contents("second"))
+        list(recorder.models.generate_content_stream(model="m", contents=_contents("third")))
+        with open(path) as f:
+            print(f"{len(f.readlines())} calls recorded")
+
+        # Test 2: Replay matches requests by content, not by order
+        replay = ReplayClient(path)
+        second = replay.models.generate_content(model="m", contents=_contents("second")).text
+        first = replay.models.generate_content(model="m", contents=_contents("first")).text
+        print(second, first)
+        assert second == "echo: second" and first == "echo: first"
+        assert replay.calls == 2
+
+        # Test 3: A streamed recording replayed without streaming is joined
+        response = replay.models.generate_content(model="m", contents=_contents("third"))
+        print(response.text)
+        assert response.text == "streamed answer"
+
+        # Test 4: An exhausted transcript is an error
+        try:
+            replay.models.generate_content(model="m", contents=_contents("fourth"))
+            assert False, "an exhausted transcript should raise"
+        except RuntimeError as e:
+            print("Error:", e)
+
+
+if __name__ == "__main__":
+    test_clients()
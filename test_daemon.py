@@ -0,0 +1,113 @@
+"""Tests for the agent daemon and its client, against a replayed model."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.agent_loop import synthetic_transcript
+from daemon import request
+
+
+def test_daemon():
+    print("\n=== Testing the agent daemon ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        transcript = os.path.join(temp_dir, "transcript.jsonl")
+        with open(transcript, "w", encoding="utf-8") as f:
+            for _ in range(3):
+                for entry in synthetic_transcript(1, 2):
+                    f.write(json.dumps(entry) + "\n")
+        socket_path = os.path.join(temp_dir, "agent.sock")
+        sessions_dir = os.path.join(temp_dir, "sessions")
+        env = {**os.environ, "AGENT_DAEMON_SOCKET": socket_path, "AGENT_SESSIONS_DIR": sessions_dir}
+
+        server = subprocess.Popen(
+            [sys.executable, "daemon.py", "serve", "--replay", transcript],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        try:
+            deadline = time.time() + 30
+            while not os.path.exists(socket_path):
+                assert server.poll() is None and time.time() < deadline, "daemon did not start"
+                time.sleep(0.05)
+
+            # Test 1: Output is streamed back before the final result
+            output = []
+            reply = request(socket_path, {"prompt": "Check the calculator"}, output.append)
+            print("".join(output))
+            print(reply)
+            assert reply["type"] == "result" and reply["response"] == "The calculator works as expected."
+            assert "Calling function: get_files_info" in "".join(output)
+            assert os.path.exists(os.path.join(sessions_dir, f"{reply['session']}.jsonl"))
+
+            # Test 2: The warm daemon answers further prompts through the thin client CLI
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "daemon.py", "ask", "Check it again"],
+                env=env, capture_output=True, text=True, timeout=30,
+            )
+            print(f"ask round trip: {(time.perf_counter() - start) * 1000:.1f} ms")
+            print(result.stdout)
+            assert result.returncode == 0 and "Final response:" in result.stdout
+
+            # Test 3: Bad requests get an error instead of hanging
+            assert request(socket_path, {"prompt": ""})["type"] == "error"
+
+            subprocess.run([sys.executable, "daemon.py", "stop"], env=env, timeout=30)
+            server.wait(timeout=30)
+            assert not os.path.exists(socket_path)
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
+            print(f"Daemon log:\n{server.stdout.read()}")
+
+    # Test 4: The context cache is extended, and recreated once it can't be
+    import main
+
+    calls = []
+
+    def update(name, config):
+        calls.append(("update", name, config.ttl))
+        if name == "expired":
+            raise RuntimeError("cache not found")
+
+    def create(model, config):
+        calls.append(("create", model))
+        return SimpleNamespace(name="fresh")
+
+    client = SimpleNamespace(caches=SimpleNamespace(update=update, create=create))
+    assert main.refresh_context_cache(client, SimpleNamespace(name="live")).name == "live"
+    assert main.refresh_context_cache(client, SimpleNamespace(name="expired")).name == "fresh"
+    print(calls)
+    assert [call[0] for call in calls] == ["update", "update", "create"]
+    assert main.get_request_config().cached_content == "fresh"
+    main._request_config = None
+
+    # Test 5: Settings from the environment are picked up when it is (re)loaded
+    import config
+
+    saved = {name: os.environ.get(name) for name in ("ENVIRONMENT", "AGENT_DAEMON_SOCKET")}
+    saved_socket = config.Config.DAEMON_SOCKET
+    try:
+        os.environ.update(ENVIRONMENT="production", AGENT_DAEMON_SOCKET="/tmp/other-agent.sock")
+        config.load_environment()
+        assert config.ENVIRONMENT == "production" and isinstance(config.config, config.ProductionConfig)
+        assert config.Config.DAEMON_SOCKET == "/tmp/other-agent.sock"
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        config.Config.DAEMON_SOCKET = saved_socket
+        config.load_environment()
+
+    print("\n=== Test completed ===")
+
+
+if __name__ == "__main__":
+    test_daemon()
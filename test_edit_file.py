@@ -0,0 +1,69 @@
+import os
+import shutil
+from functions.edit_file import edit_file
+
+def test_edit_file():
+    # Setup test directory
+    test_dir = "test_edit_file_dir"
+    os.makedirs(test_dir, exist_ok=True)
+    path = os.path.join(test_dir, "calc.py")
+    original = "def add(a, b):\n    return a + b\n\ndef sub(a, b):\n    return a - b\n"
+
+    def read():
+        with open(path) as f:
+            return f.read()
+
+    try:
+        with open(path, 'w') as f:
+            f.write(original)
+
+        # Test 1: Search/replace block
+        result = edit_file(test_dir, "calc.py", edits=[{"search": "return a - b", "replace": "return a - b  # difference"}])
+        print(result)
+        assert result.startswith('Successfully edited "calc.py": 1 change(s) at line 5')
+        assert read().endswith("return a - b  # difference\n")
+
+        # Test 2: Ambiguous or missing search blocks leave the file untouched
+        before = read()
+        result = edit_file(test_dir, "calc.py", edits=[{"search": "(a, b)", "replace": "(x, y)"}])
+        print(result)
+        assert "matches 2 times" in result and read() == before
+        result = edit_file(test_dir, "calc.py", edits=[{"search": "multiply", "replace": "mul"}])
+        print(result)
+        assert "not found" in result and read() == before
+
+        # Test 3: Unified diff, with the hunk header off by a line
+        diff = (
+            "--- a/calc.py\n"
+            "+++ b/calc.py\n"
+            "@@ -1,3 +1,4 @@\n"
+            "     return a + b\n"
+            " \n"
+            "+\n"
+            " def sub(a, b):\n"
+        )
+        result = edit_file(test_dir, "calc.py", diff=diff)
+        print(result)
+        assert result.startswith('Successfully edited "calc.py": 1 change(s) at line 4 (-0 +1 lines')
+        assert read() == "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b  # difference\n"
+
+        # Test 4: A diff whose context doesn't match is rejected
+        before = read()
+        result = edit_file(test_dir, "calc.py", diff="@@ -1,1 +1,1 @@\n-def mul(a, b):\n+def times(a, b):\n")
+        print(result)
+        assert "does not apply cleanly" in result and read() == before
+
+        # Test 5: No temp files are left behind
+        assert os.listdir(test_dir) == ["calc.py"]
+
+        # Test 6: Outside the working directory and missing files (should fail)
+        print(edit_file(test_dir, "../calc.py", edits=[{"search": "a", "replace": "b"}]))
+        print(edit_file(test_dir, "missing.py", edits=[{"search": "a", "replace": "b"}]))
+
+    finally:
+        # Cleanup
+        if os.path.exists(test_dir):
+            shutil.rmtree(test_dir)
+
+if __name__ == "__main__":
+    test_edit_file()
@@ -0,0 +1,62 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from executor import ToolExecutor
+
+
+def _call(name, **args):
+    return SimpleNamespace(name=name, args=args)
+
+
+def test_executor():
+    executor = ToolExecutor(max_workers=4)
+    log = []
+    lock = threading.Lock()
+
+    def fake_call(function_call_part):
+        time.sleep(0.2)
+        with lock:
+            log.append((function_call_part.name, dict(function_call_part.args)))
+        return f"{function_call_part.name} done"
+
+    try:
+        # Test 1: Independent reads run concurrently and keep their order
+        calls = [_call("get_file_content", file_path=f"file{i}.py") for i in range(4)]
+        start = time.perf_counter()
+        results = executor.run(calls, fake_call)
+        elapsed = time.perf_counter() - start
+        print(f"4 reads finished in {elapsed:.2f}s")
+        assert elapsed < 0.6, "independent calls should overlap"
+        assert results == ["get_file_content done"] * 4
+
+        # Test 2: A write and a read of the same path run in order
+        log.clear()
+        calls = [
+            _call("write_file", file_path="pkg/calculator.py", content="x"),
+            _call("get_file_content", file_path="./pkg/calculator.py"),
+        ]
+        start = time.perf_counter()
+        executor.run(calls, fake_call)
+        elapsed = time.perf_counter() - start
+        print(f"Conflicting write/read finished in {elapsed:.2f}s: {[name for name, _ in log]}")
+        assert [name for name, _ in log] == ["write_file", "get_file_content"]
+        assert elapsed >= 0.4, "conflicting calls should not overlap"
+
+        # Test 3: run_python_file waits for an earlier write anywhere in the workspace
+        log.clear()
+        calls = [
+            _call("write_file", file_path="lorem.txt", content="x"),
+            _call("run_python_file", file_path="tests.py"),
+            _call("get_files_info", directory="pkg"),
+        ]
+        executor.run(calls, fake_call)
+        print(f"Order with a workspace run: {[name for name, _ in log]}")
+        assert log[-1][0] == "run_python_file"
+
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_executor()
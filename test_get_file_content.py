@@ -41,6 +41,27 @@ def test_get_file_content():
         result = get_file_content(test_dir, "pkg/does_not_exist.py")
         print("Error:", result)
         
+        # Test 6: Read a line window of a file larger than the read limit
+        with open(os.path.join(test_dir, "big.txt"), 'w') as f:
+            f.write("".join(f"line {i}\n" for i in range(1, 5001)))
+        result = get_file_content(test_dir, "big.txt", start_line=4000, end_line=4002)
+        print(result)
+        assert result.startswith("line 4000\nline 4001\nline 4002\n")
+        assert "lines 4000-4002 of 5000" in result
+        
+        # Test 7: Read a byte range
+        result = get_file_content(test_dir, "pkg/calculator.py", offset=4, length=3)
+        print(result)
+        assert result == "add\n[File pkg/calculator.py: bytes 4-7 of 69, lines 1-1 of 5]"
+        
+        # Test 8: A range past the end of the file is an error; one running past it is clipped
+        result = get_file_content(test_dir, "lorem.txt", offset=1000)
+        print(result)
+        assert result == 'Error: Requested range starts past the end of "lorem.txt" (28 bytes, 1 lines)'
+        result = get_file_content(test_dir, "lorem.txt", offset=20, length=1000)
+        print(result)
+        assert result == "em ipsum\n[File lorem.txt: bytes 20-28 of 28, lines 1-1 of 1]"
+        
     finally:
         # Cleanup
         if os.path.exists(test_dir):
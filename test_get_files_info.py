@@ -42,6 +42,31 @@ def test_get_files_info():
         result = get_files_info(test_dir, "../")
         print("Result for '../' directory:")
         print(result)
+        print()
+        
+        # Test 5: Recursive listing with an extension filter
+        result = get_files_info(test_dir, ".", recursive=True, extensions=[".py"])
+        print("Result for recursive '.py' listing:")
+        print(result)
+        print()
+        assert result.startswith("- pkg/module.py:") and "file1.txt" not in result
+        
+        # Test 6: Pagination with a cursor
+        first_page = get_files_info(test_dir, ".", limit=2)
+        print("First page:")
+        print(first_page)
+        assert 'cursor="2"' in first_page
+        second_page = get_files_info(test_dir, ".", limit=2, cursor="2")
+        print("Second page:")
+        print(second_page)
+        assert second_page.startswith("- pkg:") and "cursor" not in second_page
+        
+        # Test 7: Recursive listings don't follow a symlink back up the tree
+        os.symlink("..", os.path.join(test_dir, "pkg", "loop"))
+        result = get_files_info(test_dir, ".", recursive=True)
+        print("Result with a symlink loop:")
+        print(result)
+        assert "- pkg/loop:" in result and "pkg/loop/" not in result
         
     finally:
         # Cleanup
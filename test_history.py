@@ -0,0 +1,44 @@
+from google.genai import types
+
+from history import HistoryManager, estimate_tokens
+
+
+def _exchange(name, args, result):
+    call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+    response = types.Content(role="user", parts=[types.Part.from_function_response(name=name, response={"result": result})])
+    return [call, response]
+
+
+def _result(message):
+    return message.parts[0].function_response.response["result"]
+
+
+def test_history():
+    messages = [types.Content(role="user", parts=[types.Part(text="Fix the calculator")])]
+    messages += _exchange("get_file_content", {"file_path": "pkg/calculator.py"}, "x = 1\n" * 2000)
+    messages += _exchange("run_python_file", {"file_path": "tests.py"}, "FAILED\n" * 2000)
+    messages += _exchange("get_file_content", {"file_path": "./pkg/calculator.py"}, "x = 2\n" * 2000)
+    messages += _exchange("get_files_info", {"directory": "."}, "- main.py: file_size=10 bytes, is_dir=False")
+
+    # Test 1: Under budget, only superseded reads are dropped
+    manager = HistoryManager(token_budget=100000, keep_recent_turns=4)
+    saved = manager.compact(messages)
+    print(f"Saved ~{saved} tokens by de-duplicating reads")
+    assert _result(messages[2]).startswith("[Superseded")
+    assert _result(messages[6]) == "x = 2\n" * 2000
+
+    # Test 2: Over budget, stale outputs are summarized but recent turns stay intact
+    manager = HistoryManager(token_budget=1000, keep_recent_turns=4)
+    before = estimate_tokens(messages)
+    manager.compact(messages)
+    print(f"Estimated tokens: {before} -> {estimate_tokens(messages)}")
+    assert "output elided" in _result(messages[4])
+    assert _result(messages[6]) == "x = 2\n" * 2000
+    assert messages[0].parts[0].text == "Fix the calculator"
+
+    # Test 3: Compacting again changes nothing
+    assert manager.compact(messages) == 0
+
+
+if __name__ == "__main__":
+    test_history()
@@ -0,0 +1,58 @@
+"""Tests for running scripts through the pre-warmed interpreter pool."""
+
+import os
+import tempfile
+import time
+
+from config import Config
+from functions.run_python_file import run_python_file
+
+
+def test_interpreter_pool():
+    """Compare pool results with plain subprocess runs."""
+    print("\n=== Testing run_python_file with the interpreter pool ===")
+    pool_mode = Config.PYTHON_WORKER_POOL
+    try:
+        for use_pool in (False, True):
+            Config.PYTHON_WORKER_POOL = use_pool
+            run_python_file("calculator", "tests.py")  # Warm up
+
+            start = time.perf_counter()
+            result = run_python_file("calculator", "main.py", ["3 + 5"])
+            elapsed = time.perf_counter() - start
+            print(f"Pool={use_pool}: {elapsed * 1000:.1f} ms")
+            print(result)
+
+            # Each call runs in a clean child: globals and argv don't leak between runs
+            result = run_python_file("calculator", "main.py", ["2 * 3"])
+            assert '"result": 6' in result and '"result": 8' not in result
+
+            result = run_python_file("calculator", "../main.py")
+            print(result)
+
+            with tempfile.TemporaryDirectory() as temp_dir:
+                # Output beyond the limit is dropped as it is produced, keeping the head and tail
+                with open(os.path.join(temp_dir, "chatty.py"), "w") as f:
+                    f.write("print('first')\nfor i in range(200000):\n    print('x' * 50)\nprint('last')\n")
+                result = run_python_file(temp_dir, "chatty.py")
+                assert len(result) < Config.MAX_OUTPUT_BYTES * 2
+                assert "first" in result and "last" in result and "bytes of output dropped" in result
+
+                # Output is read until a process the script started stops writing it
+                with open(os.path.join(temp_dir, "background.py"), "w") as f:
+                    f.write(
+                        "import subprocess, sys\n"
+                        "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(1.5); print(\"late\")'])\n"
+                        "print('early')\n"
+                    )
+                result = run_python_file(temp_dir, "background.py")
+                print(result)
+                assert "early" in result and "late" in result
+    finally:
+        Config.PYTHON_WORKER_POOL = pool_mode
+
+    print("\n=== Test completed ===")
+
+
+if __name__ == "__main__":
+    test_interpreter_pool()
@@ -6,7 +6,8 @@ from pathlib import Path
 
 # Add the parent directory to the path so we can import run_python_file
 sys.path.append(str(Path(__file__).parent.parent))
-from functions.run_python_file import run_python_file
+from config import Config
+from functions.run_python_file import parse_exit_code, run_python_file
 
 
 def test_run_python_file():
@@ -36,6 +37,32 @@ def test_run_python_file():
     # Test 6: Try to run a non-Python file (should fail)
     result = run_python_file("calculator", "lorem.txt")
     print(result)
+
+    # Test 7: A chatty script keeps only the head and tail of its output
+    script = Path("calculator") / "chatty_test_script.py"
+    script.write_text("for i in range(100000):\n    print(f'line {i}')\n")
+    limit = Config.MAX_OUTPUT_BYTES
+    try:
+        Config.MAX_OUTPUT_BYTES = 200
+        result = run_python_file("calculator", script.name)
+        print(result)
+        assert result.startswith("STDOUT:\nline 0\n") and result.rstrip().endswith("line 99999")
+        assert "bytes of output dropped" in result and len(result) < 400
+    finally:
+        Config.MAX_OUTPUT_BYTES = limit
+        script.unlink()
+
+    # Test 8: A script that fails silently still reports its exit code
+    script = Path("calculator") / "silent_test_script.py"
+    script.write_text("raise SystemExit(3)\n")
+    try:
+        result = run_python_file("calculator", script.name)
+        print(result)
+        assert result == "No output produced.\n\nProcess exited with code 3"
+        assert parse_exit_code(result) == 3
+        assert parse_exit_code("STDOUT:\n8") is None and parse_exit_code("Error: File \"x.py\" not found") is None
+    finally:
+        script.unlink()
     
     print("\n=== Test completed ===")
 
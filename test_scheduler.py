@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+from google.genai import errors
+
+from scheduler import RequestScheduler, TokenBucket, retry_hint
+
+
+class FakeClock:
+    """Clock whose sleeps only move time forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def rate_limited(delay="7s"):
+    details = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": delay}]
+    return errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "details": details}})
+
+
+def failing(*failures):
+    """Return a request that raises each failure in turn, then succeeds."""
+    pending = list(failures)
+
+    def request():
+        if pending:
+            raise pending.pop(0)
+        return "ok"
+    return request
+
+
+def test_scheduler():
+    # Test 1: RetryInfo from a 429 is parsed
+    assert retry_hint(rate_limited("30s")) == 30.0
+    assert retry_hint(errors.ServerError(503, {"error": {"code": 503}})) is None
+
+    # Test 2: A 429 is retried after the server's hint, a 503 with capped backoff
+    clock = FakeClock()
+    scheduler = RequestScheduler(0, 0, max_retries=3, base_delay=1.0, max_delay=4.0, clock=clock, sleep=clock.sleep)
+    server_error = errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE"}})
+    assert scheduler.call(failing(rate_limited("7s"), server_error)) == "ok"
+    print(f"Retry sleeps: {[round(s, 2) for s in clock.sleeps]}")
+    assert scheduler.retries == 2 and 7.0 <= clock.sleeps[0] <= 8.0 and clock.sleeps[1] <= 2.0
+
+    # Test 3: Client errors and exhausted retries are raised
+    try:
+        scheduler.call(failing(errors.ClientError(400, {"error": {"code": 400}})))
+        assert False, "400 should not be retried"
+    except errors.ClientError as e:
+        assert e.code == 400
+    try:
+        scheduler.call(failing(*[server_error] * 4))
+        assert False, "retries should run out"
+    except errors.ServerError:
+        pass
+
+    # Test 4: A 429 seen by one caller holds back the next one too
+    clock = FakeClock()
+    scheduler = RequestScheduler(0, 0, base_delay=0.0, clock=clock, sleep=clock.sleep)
+    scheduler.call(failing(rate_limited("10s")))
+    clock.now = 5.0
+    clock.sleeps.clear()
+    scheduler.call(failing())
+    assert clock.sleeps == [5.0]
+
+    # Test 5: Requests and tokens per minute are paced instead of bursting past the quota
+    clock = FakeClock()
+    scheduler = RequestScheduler(60, 1000, clock=clock, sleep=clock.sleep)
+    for _ in range(61):
+        scheduler.call(failing())
+    assert clock.sleeps == [1.0]
+    bucket = TokenBucket(600, clock)
+    assert bucket.reserve(600) == 0.0 and bucket.reserve(300) == 30.0
+    bucket.adjust(-300)
+    assert bucket.reserve(0) == 0.0
+
+    # Test 6: The limit holds across threads and for async callers
+    scheduler = RequestScheduler(6000, 0)
+    threads = [threading.Thread(target=scheduler.call, args=(failing(),)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scheduler.requests.tokens <= 6000 - 8 + 1
+
+    async def flaky():
+        return "ok"
+    calls = iter([rate_limited("0s"), None])
+
+    async def request():
+        error = next(calls)
+        if error:
+            raise error
+        return await flaky()
+    scheduler = RequestScheduler(0, 0, base_delay=0.01)
+    assert asyncio.run(scheduler.acall(request)) == "ok" and scheduler.retries == 1
+    print("Scheduler tests passed")
+
+
+if __name__ == "__main__":
+    test_scheduler()
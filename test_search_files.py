@@ -0,0 +1,96 @@
+import os
+import shutil
+import time
+from functions.search_files import _required_literals, get_index, search_files
+
+def test_search_files():
+    # Setup test directory structure
+    test_dir = "test_search_files_dir"
+    os.makedirs(os.path.join(test_dir, "pkg"), exist_ok=True)
+
+    test_files = {
+        "main.py": "from pkg.calculator import Calculator\n\ncalc = Calculator()\nprint(calc.evaluate('1 + 2'))\n",
+        "notes.txt": "nothing to see here\n",
+        "pkg/calculator.py": "class Calculator:\n    def evaluate(self, expression):\n        return expression\n",
+    }
+
+    try:
+        for path, content in test_files.items():
+            with open(os.path.join(test_dir, path), 'w') as f:
+                f.write(content)
+
+        # Test 1: Literal search across the tree
+        result = search_files(test_dir, "Calculator")
+        print("Result for 'Calculator':")
+        print(result)
+        print()
+        assert "main.py:1: from pkg.calculator import Calculator" in result
+        assert "pkg/calculator.py:1: class Calculator:" in result
+
+        # Test 2: Regex search with context, limited to a directory
+        result = search_files(test_dir, r"def \w+\(self", directory="pkg", regex=True, context_lines=1)
+        print("Result for regex with context:")
+        print(result)
+        print()
+        assert result.splitlines() == [
+            "pkg/calculator.py-1- class Calculator:",
+            "pkg/calculator.py:2:     def evaluate(self, expression):",
+            "pkg/calculator.py-3-         return expression",
+        ]
+
+        # Test 3: Case-insensitive search and result limits
+        result = search_files(test_dir, "CALC", case_sensitive=False, max_results=2)
+        print("Result for limited case-insensitive search:")
+        print(result)
+        print()
+        assert result.endswith("more matches not shown]")
+
+        # Test 4: Only changed files are re-indexed
+        index = get_index(test_dir)
+        assert index.refresh() == 0
+        time.sleep(0.01)
+        with open(os.path.join(test_dir, "notes.txt"), 'w') as f:
+            f.write("the Calculator is documented here\n")
+        assert index.refresh() == 1
+        assert "notes.txt:1:" in search_files(test_dir, "Calculator")
+
+        # Test 5: Deleted files drop out of the index
+        os.remove(os.path.join(test_dir, "notes.txt"))
+        assert "notes.txt" not in search_files(test_dir, "Calculator")
+
+        # Test 6: Errors and empty results
+        print(search_files(test_dir, "no such text"))
+        print(search_files(test_dir, "(", regex=True))
+        print(search_files(test_dir, "x", directory="../"))
+        assert search_files(test_dir, "no such text").startswith("No matches")
+        assert search_files(test_dir, "(", regex=True).startswith("Error:")
+        assert search_files(test_dir, "x", directory="../").startswith("Error:")
+
+        # Test 7: Only literals every match needs are used to narrow the candidates
+        assert _required_literals(r"def \w+\(self") == ["def ", "(self"]
+        assert _required_literals("evaluate|compute") == []
+        assert _required_literals("calcs?ulator") == ["calc", "ulator"]
+        assert _required_literals(r"\x41BCD") == ["bcd"]
+        assert _required_literals(r"\u0041BC|x") == []
+        assert _required_literals(r"\N{LATIN CAPITAL LETTER A}BCD") == ["bcd"]
+        assert _required_literals(r"\101BCD") == ["bcd"]
+        assert _required_literals("(?x) foo bar") == []
+        assert _required_literals("(?i:abc)defg") == []
+        assert _required_literals(r"(a|b\))xyz[)(]uvw") == ["xyz", "uvw"]
+        assert _required_literals("[]abc]xyz") == ["xyz"]
+        assert _required_literals("[^]abc]xyz") == ["xyz"]
+
+        # Test 8: Escapes, inline flags and classes still find the files that match
+        with open(os.path.join(test_dir, "letters.txt"), "w") as f:
+            f.write("ABCD\nfoobar\n]xyz\n")
+        assert "letters.txt:1:" in search_files(test_dir, r"\x41BCD", regex=True)
+        assert "letters.txt:2:" in search_files(test_dir, "(?x) foo bar", regex=True)
+        assert "letters.txt:3:" in search_files(test_dir, "[]abc]xyz", regex=True)
+
+    finally:
+        # Cleanup
+        if os.path.exists(test_dir):
+            shutil.rmtree(test_dir)
+
+if __name__ == "__main__":
+    test_search_files()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import threading
+
+from google.genai import types
+
+from sessions import SessionLog, is_finished
+
+
+def tool_turn(file_path, content):
+    call = types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name="get_file_content", args={"file_path": file_path}))],
+    )
+    response = types.Content(
+        role="user",
+        parts=[types.Part.from_function_response(name="get_file_content", response={"result": content})],
+    )
+    return call, response
+
+
+def test_sessions():
+    test_dir = "test_sessions_dir"
+    big = "x = 1\n" * 1000
+
+    try:
+        # Test 1: Messages round-trip, with repeated large payloads stored once
+        log = SessionLog("s1", directory=test_dir)
+        messages = [types.Content(role="user", parts=[types.Part(text="Read main.py twice")])]
+        messages.extend(tool_turn("main.py", big))
+        log.sync(messages)
+        messages.extend(tool_turn("main.py", big))
+        log.sync(messages)
+        log.sync(messages)
+
+        log_size = os.path.getsize(log.path)
+        blobs = os.listdir(log.blob_dir)
+        print(f"Log: {log_size} bytes, {len(blobs)} blob(s)")
+        assert log_size < len(big) and len(blobs) == 1
+
+        loaded = SessionLog("s1", directory=test_dir).load()
+        assert [m.model_dump() for m in loaded] == [m.model_dump() for m in messages]
+        assert not is_finished(loaded)
+
+        # Test 2: A turn cut off before its tool responses is dropped, along with a partial line
+        call, _ = tool_turn("pkg/calculator.py", "")
+        log.sync(messages + [call])
+        with open(log.path, "a", encoding="utf-8") as f:
+            f.write('{"role": "us')
+        resumed = SessionLog("s1", directory=test_dir)
+        loaded = resumed.load()
+        assert len(loaded) == len(messages)
+
+        # Test 3: New turns are appended right after the reloaded ones
+        loaded.append(types.Content(role="model", parts=[types.Part(text="Done")]))
+        resumed.sync(loaded)
+        final = SessionLog("s1", directory=test_dir).load()
+        print(f"Resumed session has {len(final)} messages")
+        assert len(final) == len(messages) + 1 and is_finished(final)
+
+        # Test 4: Threads storing the same blob at once each use their own temp file
+        payloads = [{"result": big + "shared"}] * 8
+        threads = [threading.Thread(target=log._store_blob, args=(payload,)) for payload in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        blobs = os.listdir(log.blob_dir)
+        assert len(blobs) == 2 and not any(name.endswith(".tmp") for name in blobs)
+
+    finally:
+        if os.path.exists(test_dir):
+            shutil.rmtree(test_dir)
+
+
+if __name__ == "__main__":
+    test_sessions()
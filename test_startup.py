@@ -0,0 +1,19 @@
+"""Tests that the CLI starts without loading the Gemini SDK."""
+
+from benchmarks.startup import CASES, import_profile
+
+
+def test_startup():
+    print("\n=== Testing CLI startup imports ===")
+    for name, (args, forbidden) in CASES.items():
+        if not forbidden:
+            continue
+        modules = import_profile(args)
+        loaded = sorted(module for module in modules if module.startswith(forbidden))
+        print(f"{name}: {len(modules)} modules imported")
+        assert modules and not loaded, f"{name} imports {loaded[:3]}"
+    print("\n=== Test completed ===")
+
+
+if __name__ == "__main__":
+    test_startup()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import time
+
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.run_python_file import run_python_file
+from tool_cache import CACHED_RUN_MARKER, Prefetcher, ScriptRunCache, ToolResultCache
+
+
+def test_tool_cache():
+    test_dir = "test_tool_cache_dir"
+    os.makedirs(os.path.join(test_dir, "pkg"), exist_ok=True)
+    cache = ToolResultCache(max_entries=2)
+
+    def read(path):
+        args = {"working_directory": test_dir, "file_path": path}
+        return cache.get_or_call("get_file_content", args, lambda: get_file_content(**args))
+
+    try:
+        with open(os.path.join(test_dir, "pkg", "module.py"), "w") as f:
+            f.write("def hello():\n    return 'hello'")
+
+        # Test 1: A repeated read (with a differently spelled path) is a hit
+        first = read("pkg/module.py")
+        second = read("./pkg/module.py")
+        print(f"Repeated read: {cache.stats()}")
+        assert first == second and cache.hits == 1
+
+        # Test 2: A file changed on disk misses because its mtime/size changed
+        time.sleep(0.01)
+        with open(os.path.join(test_dir, "pkg", "module.py"), "w") as f:
+            f.write("def hello():\n    return 'changed'")
+        assert "changed" in read("pkg/module.py")
+
+        # Test 3: A write through the agent invalidates the file and its listings
+        listing_args = {"working_directory": test_dir, "directory": "pkg"}
+        cache.get_or_call("get_files_info", listing_args, lambda: get_files_info(**listing_args))
+        cache.invalidate_after("write_file", {"working_directory": test_dir, "file_path": "pkg/module.py"})
+        print(f"After write: {cache.stats()}")
+        assert "0/2 entries" in cache.stats()
+
+        # Test 4: Recursive listings miss when a subdirectory gains an entry
+        listing_args = {"working_directory": test_dir, "directory": ".", "recursive": True}
+
+        def listing():
+            return cache.get_or_call("get_files_info", listing_args, lambda: get_files_info(**listing_args))
+
+        before = listing()
+        hits = cache.hits
+        assert listing() == before and cache.hits == hits + 1
+        with open(os.path.join(test_dir, "pkg", "new.py"), "w") as f:
+            f.write("")
+        added = listing()
+        print(f"Recursive listing after adding a file:\n{added}")
+        assert "pkg/new.py" in added
+
+        # Test 5: LRU eviction keeps at most max_entries results
+        for name in ("a.txt", "b.txt", "c.txt"):
+            with open(os.path.join(test_dir, name), "w") as f:
+                f.write(name)
+            read(name)
+        print(f"After eviction: {cache.stats()}")
+        assert "2/2 entries" in cache.stats()
+
+        # Test 6: Running a script clears the cache
+        cache.invalidate_after("run_python_file", {"working_directory": test_dir, "file_path": "main.py"})
+        assert "0/2 entries" in cache.stats()
+
+        # Test 7: Script runs are reused until a Python source in the workspace changes
+        runs = ScriptRunCache()
+        run_args = {"working_directory": test_dir, "file_path": "main.py", "args": ["x"]}
+        with open(os.path.join(test_dir, "main.py"), "w") as f:
+            f.write("import sys\nfrom pkg.module import hello\nprint(hello(), sys.argv[1:])")
+        first = runs.get_or_call(run_args, lambda: run_python_file(**run_args))
+        second = runs.get_or_call(run_args, lambda: run_python_file(**run_args))
+        print(second)
+        assert not first.startswith(CACHED_RUN_MARKER) and second == f"{CACHED_RUN_MARKER}\n{first}"
+        assert not runs.get_or_call({**run_args, "args": ["y"]}, lambda: "other args").startswith(CACHED_RUN_MARKER)
+
+        time.sleep(0.01)
+        with open(os.path.join(test_dir, "pkg", "module.py"), "w") as f:
+            f.write("def hello():\n    return 'edited'")
+        third = runs.get_or_call(run_args, lambda: run_python_file(**run_args))
+        print(third)
+        assert "edited" in third and not third.startswith(CACHED_RUN_MARKER)
+        print(f"Run cache: {runs.stats()}")
+
+        # Test 8: Small files named by a listing are prefetched, and a later read is a hit
+        cache = ToolResultCache()
+        prefetcher = Prefetcher(cache, get_file_content)
+        with open(os.path.join(test_dir, "pkg", "big.py"), "w") as f:
+            f.write("#" * 20000)
+        listing_args = {"working_directory": test_dir, "directory": "pkg"}
+        listing = get_files_info(**listing_args)
+        assert prefetcher.candidates(listing, "pkg") == ["pkg/module.py"]
+        for future in prefetcher.after_listing(listing_args, listing):
+            future.result()
+        args = {"working_directory": test_dir, "file_path": "pkg/module.py"}
+        assert "edited" in cache.get_or_call("get_file_content", args, lambda: "not from the cache")
+        print(f"After prefetch: {cache.stats()}")
+        assert cache.hits == 1 and cache.prefetch_hits == 1 and cache.misses == 0
+        prefetcher.shutdown()
+
+    finally:
+        if os.path.exists(test_dir):
+            shutil.rmtree(test_dir)
+
+
+if __name__ == "__main__":
+    test_tool_cache()
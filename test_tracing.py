@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from executor import ToolExecutor
+from scheduler import RequestScheduler
+from tracing import Tracer, tracer, usage_attrs
+
+
+def test_tracing():
+    # Test 1: Nothing is recorded until the tracer is enabled
+    local = Tracer()
+    with local.span("tool", "get_file_content"):
+        pass
+    assert local.spans == []
+
+    # Test 2: Spans record their timing, attributes added inside the block, and errors
+    local.enable()
+    with local.span("session", "run_agent"):
+        with local.span("model", "gemini") as span:
+            time.sleep(0.01)
+            span.update(usage_attrs(SimpleNamespace(prompt_token_count=120, candidates_token_count=30)))
+        with local.span("tools", "turn"):
+            with local.span("tool", "run_python_file", bytes=42, exit_code=1):
+                pass
+        try:
+            with local.span("tool", "write_file"):
+                raise OSError("disk full")
+        except OSError:
+            pass
+    model = next(span for span in local.spans if span["kind"] == "model")
+    print(model)
+    assert model["duration_ms"] >= 10 and model["prompt_tokens"] == 120 and model["response_tokens"] == 30
+    assert next(span for span in local.spans if span["name"] == "write_file")["error"] == "disk full"
+    assert usage_attrs(None) == {}
+
+    # Test 3: Export writes one JSON span per line in start order
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "trace.jsonl")
+        local.export(path)
+        with open(path, encoding="utf-8") as f:
+            exported = [json.loads(line) for line in f]
+    assert len(exported) == 5 and exported[0]["kind"] == "session"
+    assert [span["start_ms"] for span in exported] == sorted(span["start_ms"] for span in exported)
+
+    # Test 4: The summary groups spans and totals tokens, output and failed scripts
+    summary = local.summary()
+    print(summary)
+    assert "Model tokens: 120 prompt, 30 response" in summary
+    assert "Tool output: 42 bytes" in summary and "Scripts with non-zero exit code: 1" in summary
+    assert Tracer().summary() == "No spans recorded."
+
+    # Test 5: Queue waits of tool calls and throttled model calls go to the process-wide tracer
+    tracer.enable()
+    executor = ToolExecutor(max_workers=2)
+    try:
+        calls = [
+            SimpleNamespace(name="write_file", args={"file_path": "a.py", "content": "x"}),
+            SimpleNamespace(name="get_file_content", args={"file_path": "a.py"}),
+        ]
+        executor.run(calls, lambda call: time.sleep(0.05))
+        scheduler = RequestScheduler(60, 0)
+        scheduler.requests.tokens = 0.0
+        scheduler.requests.rate = 100.0  # Refill fast so the throttle wait stays short
+        scheduler.call(lambda: None)
+
+        queued = [span for span in tracer.spans if span["kind"] == "queue"]
+        print(queued)
+        assert [span["waited_on"] for span in queued] == [0, 1]
+        assert queued[1]["duration_ms"] >= 40
+        assert any(span["kind"] == "throttle" and span["name"] == "model" for span in tracer.spans)
+    finally:
+        executor.shutdown()
+        tracer.enabled = False
+        tracer.spans.clear()
+    print("Tracing tests passed")
+
+
+if __name__ == "__main__":
+    test_tracing()
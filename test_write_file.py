@@ -13,13 +13,26 @@ def test_write_file():
         content = "wait, this isn't lorem ipsum"
         result = write_file(test_dir, "lorem.txt", content)
         print(f"{len(content)} characters written")
+        assert os.stat(os.path.join(test_dir, "lorem.txt")).st_mode & 0o777 == 0o644
+
+        # Test 2: Rewriting a file keeps its mode
+        os.chmod(os.path.join(test_dir, "lorem.txt"), 0o600)
+        write_file(test_dir, "lorem.txt", "rewritten")
+        assert os.stat(os.path.join(test_dir, "lorem.txt")).st_mode & 0o777 == 0o600
         
-        # Test 2: Write to a file in a subdirectory (should create the directory)
+        # Test 3: Write to a file in a subdirectory (should create the directory)
         content = "lorem ipsum dolor sit amet"
         result = write_file(test_dir, "pkg/morelorem.txt", content)
         print(f"{len(content)} characters written")
         
-        # Test 3: Attempt to write outside working directory (should fail)
+        # Test 4: Writing to a symlink replaces its target and keeps the link
+        os.symlink("lorem.txt", os.path.join(test_dir, "link.txt"))
+        write_file(test_dir, "link.txt", "through the link")
+        assert os.path.islink(os.path.join(test_dir, "link.txt"))
+        with open(os.path.join(test_dir, "lorem.txt")) as f:
+            assert f.read() == "through the link"
+        
+        # Test 5: Attempt to write outside working directory (should fail)
         result = write_file(test_dir, "/tmp/temp.txt", "this should not be allowed")
         print("Error:", result)
         
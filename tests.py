@@ -6,7 +6,20 @@ TEST_MODULES = [
     "test_write_file",
     "test_get_file_content",
     "test_get_files_info",
-    "test_run_python_file"
+    "test_run_python_file",
+    "test_executor",
+    "test_history",
+    "test_tool_cache",
+    "test_clients",
+    "test_interpreter_pool",
+    "test_search_files",
+    "test_edit_file",
+    "test_sessions",
+    "test_daemon",
+    "test_scheduler",
+    "test_startup",
+    "test_tracing",
+    "test_batch"
     # Add new test modules here
 ]
 
@@ -0,0 +1,331 @@
+"""
+LRU cache for the results of read-only tool calls.
+
+Entries are keyed by tool name, normalized arguments and the mtime/size of
+the path the tool reads (plus, for a recursive listing, the mtimes of the
+subdirectories it descends into), so a file changed behind the agent's
+back simply misses. Writes made through the agent invalidate matching
+entries explicitly, and running a script invalidates everything because
+the script may have touched any file in the workspace.
+
+ScriptRunCache is an opt-in cache for run_python_file itself, keyed by the
+script, its arguments and a hash of every Python source in the workspace.
+
+Prefetcher is an opt-in reader that, after a directory listing, loads the
+small source files it names into the ToolResultCache in the background, so
+the get_file_content calls the model usually makes next are answered from
+memory.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from config import Config
+from executor import paths_overlap
+from functions.search_files import SKIPPED_DIRECTORIES
+from tracing import tracer
+
+# Read-only tools and the argument naming the path they read
+CACHEABLE_TOOLS = {
+    "get_file_content": "file_path",
+    "get_files_info": "directory",
+}
+
+# Tools that modify the file named by the given argument
+WRITE_TOOLS = {
+    "write_file": "file_path",
+    "edit_file": "file_path",
+}
+
+
+def _normalized_path(args: dict, path_arg: str) -> str:
+    return os.path.normpath(str(args.get(path_arg) or "."))
+
+
+def _subdirectory_fingerprint(abs_dir: str, args: dict) -> Optional[str]:
+    """Hash the mtimes of the subdirectories a recursive get_files_info call descends into.
+
+    Adding, removing or renaming an entry changes its directory's mtime, so
+    this catches listings made stale below the listed directory without
+    stating every file. Returns "" for a flat listing and None if the
+    directory can't be walked.
+    """
+    if not args.get("recursive"):
+        return ""
+    try:
+        depth_limit = min(int(args.get("max_depth") or Config.MAX_DIRECTORY_DEPTH), Config.MAX_DIRECTORY_DEPTH)
+        digest = hashlib.sha256()
+        pending = [(abs_dir, "", 1)]
+        while pending:
+            path, prefix, depth = pending.pop()
+            if depth >= depth_limit:
+                continue
+            with os.scandir(path) as it:
+                for entry in it:
+                    # Like the listing itself, symlinked directories are not followed
+                    if entry.is_dir(follow_symlinks=False):
+                        name = f"{prefix}{entry.name}"
+                        mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                        digest.update(f"{name}\0{mtime}\n".encode("utf-8", "surrogateescape"))
+                        pending.append((entry.path, f"{name}/", depth + 1))
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+class ToolResultCache:
+    """Thread-safe LRU cache of tool results with hit/miss counters."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or Config.TOOL_CACHE_SIZE
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Event set when a prefetch of it finishes
+        self._prefetched = set()  # prefetched keys not read yet
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.prefetch_hits = 0
+
+    def is_cacheable(self, function_name: str) -> bool:
+        return function_name in CACHEABLE_TOOLS
+
+    def _key(self, function_name: str, function_args: dict):
+        path_arg = CACHEABLE_TOOLS[function_name]
+        args = dict(function_args)
+        args[path_arg] = _normalized_path(args, path_arg)
+        target = os.path.join(os.path.abspath(args.get("working_directory", ".")), args[path_arg])
+        try:
+            stat = os.stat(target)
+        except OSError:
+            return None, None
+        key = (function_name, json.dumps(args, sort_keys=True, default=str), stat.st_mtime_ns, stat.st_size)
+        if function_name == "get_files_info":
+            fingerprint = _subdirectory_fingerprint(target, args)
+            if fingerprint is None:
+                return None, None
+            key += (fingerprint,)
+        return key, args[path_arg]
+
+    def get_or_call(self, function_name: str, function_args: dict, call: Callable):
+        """Return the cached result for a read-only call, calling through on a miss."""
+        key, path = self._key(function_name, function_args)
+        if key is not None:
+            with self._lock:
+                pending = self._inflight.get(key)
+            if pending is not None:
+                # A prefetch of this exact read is running; wait for it rather than read twice
+                pending.wait()
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if key in self._prefetched:
+                        self._prefetched.discard(key)
+                        self.prefetch_hits += 1
+                    return self._entries[key][1]
+                self.misses += 1
+
+        result = call()
+        if key is not None and not (isinstance(result, str) and result.startswith("Error")):
+            self.put(key, path, result)
+        return result
+
+    def prefetch(self, function_name: str, function_args: dict, call: Callable) -> bool:
+        """Store the result of a read-only call ahead of time, unless it is cached already.
+
+        Returns whether the call was made. Hit and miss counters are left alone.
+        """
+        key, path = self._key(function_name, function_args)
+        if key is None:
+            return False
+        with self._lock:
+            if key in self._entries or key in self._inflight:
+                return False
+            done = self._inflight[key] = threading.Event()
+        try:
+            result = call()
+            if not (isinstance(result, str) and result.startswith("Error")):
+                self.put(key, path, result)
+                with self._lock:
+                    if key in self._entries:
+                        self._prefetched.add(key)
+                    self.prefetched += 1
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+        return True
+
+    def put(self, key, path: str, result):
+        with self._lock:
+            self._entries[key] = (path, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._prefetched.discard(evicted)
+
+    def invalidate_after(self, function_name: str, function_args: dict):
+        """Drop entries a completed non-cacheable call may have made stale."""
+        if function_name in WRITE_TOOLS:
+            self.invalidate_path(_normalized_path(function_args, WRITE_TOOLS[function_name]))
+        elif function_name == "run_python_file":
+            self.clear()
+
+    def invalidate_path(self, path: str):
+        """Drop every entry that reads the given path or a directory containing it."""
+        with self._lock:
+            for key in [key for key, (cached_path, _) in self._entries.items() if paths_overlap(cached_path, path)]:
+                del self._entries[key]
+                self._prefetched.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._prefetched.clear()
+
+    def stats(self) -> str:
+        with self._lock:
+            stats = f"{self.hits} hits, {self.misses} misses, {len(self._entries)}/{self.max_entries} entries"
+            if self.prefetched:
+                stats += f", {self.prefetch_hits}/{self.prefetched} prefetched reads used"
+            return stats
+
+
+CACHED_RUN_MARKER = "[Cached result: the script, its arguments and the workspace's Python sources are unchanged since this run]"
+
+
+class ScriptRunCache:
+    """LRU cache of run_python_file results.
+
+    A run is only reused while no .py file in the working directory changed,
+    so editing any module the script could import forces a real run. Files
+    are re-hashed only when their mtime or size changed.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or Config.RUN_CACHE_SIZE
+        self._entries = OrderedDict()
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def sources_hash(self, working_directory: str) -> str:
+        """Hash the paths and contents of every Python source under working_directory.
+
+        Runs without the lock; threads hashing at once at worst re-read a file.
+        """
+        root = os.path.abspath(working_directory)
+        digest = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRECTORIES and not d.startswith("."))
+            for filename in sorted(filenames):
+                if not filename.endswith(".py"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                    fingerprint = (stat.st_mtime_ns, stat.st_size)
+                    known = self._file_hashes.get(path)
+                    if known is None or known[0] != fingerprint:
+                        with open(path, "rb") as f:
+                            known = (fingerprint, hashlib.sha256(f.read()).hexdigest())
+                        self._file_hashes[path] = known
+                except OSError:
+                    continue
+                digest.update(f"{os.path.relpath(path, root)}\0{known[1]}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_or_call(self, function_args: dict, call: Callable) -> str:
+        """Return a stored result marked as cached, or run the script and store its result."""
+        # Hashing reads the workspace, so it is done before taking the lock
+        key = (
+            _normalized_path(function_args, "file_path"),
+            json.dumps(list(function_args.get("args") or []), default=str),
+            self.sources_hash(function_args.get("working_directory", ".")),
+        )
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return f"{CACHED_RUN_MARKER}\n{self._entries[key]}"
+            self.misses += 1
+
+        result = call()
+        # Failures to start and timeouts say nothing reliable about the next run
+        if isinstance(result, str) and not result.startswith("Error") and "Process timed out" not in result:
+            with self._lock:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> str:
+        with self._lock:
+            return f"{self.hits} hits, {self.misses} misses, {len(self._entries)}/{self.max_entries} entries"
+
+
+# One line of get_files_info output describing a file
+_LISTED_FILE = re.compile(r"^- (?P<name>.+): file_size=(?P<size>\d+) bytes, is_dir=False$")
+
+
+def listed_files(listing: str, directory: str = ".") -> list:
+    """Return (path relative to the working directory, size) for each file in a get_files_info listing."""
+    files = []
+    for line in listing.splitlines():
+        match = _LISTED_FILE.match(line)
+        if match:
+            files.append((os.path.normpath(os.path.join(directory, match["name"])), int(match["size"])))
+    return files
+
+
+class Prefetcher:
+    """Reads the small files named by a directory listing into a ToolResultCache in the background.
+
+    read is called with get_file_content arguments and returns its result.
+    """
+
+    def __init__(self, cache: ToolResultCache, read: Callable[..., str], max_workers: Optional[int] = None):
+        self.cache = cache
+        self.read = read
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_workers or Config.PREFETCH_WORKERS), thread_name_prefix="prefetch"
+        )
+
+    def candidates(self, listing: str, directory: str = ".") -> list:
+        """Return the paths from a listing worth prefetching, smallest first."""
+        extensions = tuple(Config.ALLOWED_FILE_EXTENSIONS)
+        files = sorted(
+            (size, path) for path, size in listed_files(listing, directory)
+            if 0 < size <= Config.PREFETCH_MAX_FILE_BYTES and path.endswith(extensions)
+        )
+        return [path for _, path in files[:Config.PREFETCH_MAX_FILES]]
+
+    def after_listing(self, function_args: dict, listing: str) -> list:
+        """Start reading the files a get_files_info call just listed; returns their futures."""
+        if not isinstance(listing, str) or listing.startswith("Error"):
+            return []
+        working_directory = function_args.get("working_directory", ".")
+        return [
+            self._pool.submit(self._read, {"working_directory": working_directory, "file_path": path})
+            for path in self.candidates(listing, _normalized_path(function_args, "directory"))
+        ]
+
+    def _read(self, args: dict) -> bool:
+        with tracer.span("prefetch", "get_file_content"):
+            return self.cache.prefetch("get_file_content", args, lambda: self.read(**args))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,114 @@
+"""
+Lightweight span tracing for the agent loop.
+
+Spans are recorded for each session, model call, tool phase (all tool calls
+of one turn), individual tool call, and the time a tool call spent queued
+behind the executor or a conflicting call. Tracing is off by default; when
+enabled, spans can be exported as JSONL and summarized in a table, which
+shows whether a slow session was spent in the model, the tools, or the loop.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Collects timed spans from any thread."""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs):
+        """Time the enclosed block. The yielded dict can be filled with extra attributes."""
+        if not self.enabled:
+            yield attrs
+            return
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            self.record(kind, name, start, time.perf_counter(), **attrs)
+
+    def record(self, kind: str, name: str, start: float, end: float, **attrs):
+        """Record a span from perf_counter timestamps taken elsewhere."""
+        if not self.enabled:
+            return
+        span = {
+            "kind": kind,
+            "name": name,
+            "start_ms": round((start - self._origin) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            "thread": threading.current_thread().name,
+            **attrs,
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def export(self, path: str):
+        """Write all spans to a JSONL file, in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        with open(path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+    def summary(self) -> str:
+        """Return a table of span counts and timings grouped by kind and name."""
+        with self._lock:
+            spans = list(self.spans)
+        if not spans:
+            return "No spans recorded."
+
+        groups = {}
+        for span in spans:
+            groups.setdefault((span["kind"], span["name"]), []).append(span["duration_ms"])
+
+        lines = [f"{'kind':<8} {'name':<20} {'count':>6} {'total ms':>11} {'mean ms':>10} {'max ms':>10}"]
+        for (kind, name), durations in sorted(groups.items()):
+            lines.append(
+                f"{kind:<8} {name[:20]:<20} {len(durations):>6} {sum(durations):>11.1f} "
+                f"{sum(durations) / len(durations):>10.1f} {max(durations):>10.1f}"
+            )
+
+        def total(kind, key="duration_ms"):
+            return sum(span.get(key) or 0 for span in spans if span["kind"] == kind)
+
+        overhead = total("session") - total("model") - total("tools")
+        lines.append("")
+        lines.append(f"Loop overhead (session - model - tool phases): {overhead:.1f} ms")
+        lines.append(
+            f"Model tokens: {total('model', 'prompt_tokens')} prompt, "
+            f"{total('model', 'response_tokens')} response"
+        )
+        lines.append(f"Tool output: {total('tool', 'bytes')} bytes")
+        failed = [span for span in spans if span["kind"] == "tool" and span.get("exit_code")]
+        if failed:
+            lines.append(f"Scripts with non-zero exit code: {len(failed)}")
+        return "\n".join(lines)
+
+
+def usage_attrs(usage_metadata) -> dict:
+    """Extract token counts from a response's usage metadata for a model span."""
+    if usage_metadata is None:
+        return {}
+    return {
+        "prompt_tokens": usage_metadata.prompt_token_count,
+        "response_tokens": usage_metadata.candidates_token_count,
+    }
+
+
+# Process-wide tracer used by the agent loop
+tracer = Tracer()